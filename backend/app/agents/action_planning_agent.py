@@ -3,151 +3,179 @@ Action Planning Agent
 Generates specific action plans based on risk assessments
 """
 
-import sys
-from pathlib import Path
-from typing import Dict, Any, List
+from itertools import chain
+from types import MappingProxyType
+from typing import Dict, Any, ClassVar, FrozenSet, List, Mapping, Optional, Tuple
 
-# Add backend to path for imports
-backend_dir = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(backend_dir))
+from sqlalchemy.orm import Session
 
 from app.agents.base_agent import BaseAgent
 
+# Immutable action/resource catalogs, shared across calls and copied into each plan
+_IMMEDIATE_HIGH = (
+    "Activate emergency operations center",
+    "Alert emergency response teams",
+    "Issue public warnings"
+)
+_IMMEDIATE_TYPHOON = (
+    "Issue typhoon warnings",
+    "Prepare evacuation orders",
+    "Secure critical infrastructure"
+)
+_IMMEDIATE_FLOOD = (
+    "Deploy flood monitoring equipment",
+    "Check drainage systems",
+    "Prepare sandbags and barriers"
+)
+_IMMEDIATE_DEFAULT = ("Continue monitoring weather conditions",)
+
+_SHORT_TERM_HIGH = (
+    "Conduct community briefings",
+    "Coordinate with neighboring LGUs",
+    "Prepare relief supplies"
+)
+_SHORT_TERM_MODERATE = (
+    "Review evacuation plans",
+    "Test communication systems",
+    "Update emergency contacts"
+)
+_SHORT_TERM_DEFAULT = ("Monitor weather updates continuously",)
+
+_RESOURCES_BASE = ("Emergency communications", "Weather monitoring equipment")
+_RESOURCES_HIGH = (
+    "Emergency response vehicles",
+    "Medical supplies",
+    "Evacuation transportation",
+    "Emergency shelters"
+)
+_RESOURCES_FLOOD = ("Rescue boats", "Water pumps", "Sandbags")
+
+# Hazard rules: (category, threshold, immediate actions, resources).
+# Evaluated in order, so plan output order follows this table.
+_HAZARD_RULES = (
+    ("typhoon", 0.6, _IMMEDIATE_TYPHOON, ()),
+    ("flooding", 0.6, _IMMEDIATE_FLOOD, ()),
+    ("flooding", 0.5, (), _RESOURCES_FLOOD),
+)
+
 class ActionPlanningAgent(BaseAgent):
     """Agent specialized in generating actionable response plans."""
     
+    _TIMELINES: ClassVar[Mapping[str, str]] = MappingProxyType({
+        "CRITICAL": "Immediate (0-6 hours)",
+        "HIGH": "Urgent (6-24 hours)",
+        "MODERATE": "Priority (24-48 hours)",
+        "LOW": "Routine (48+ hours)",
+        "UNKNOWN": "Monitor (ongoing)"
+    })
+    
+    # Numerical priority (1=highest, 5=lowest)
+    _PRIORITIES: ClassVar[Mapping[str, int]] = MappingProxyType({
+        "CRITICAL": 1,
+        "HIGH": 2,
+        "MODERATE": 3,
+        "LOW": 4,
+        "UNKNOWN": 5
+    })
+    
+    _COORDINATION_LEVELS: ClassVar[FrozenSet[str]] = frozenset({"CRITICAL", "HIGH"})
+    
+    # Levels whose plan is the fixed "continue monitoring" boilerplate
+    # unless a category-specific hazard rule fires
+    _ROUTINE_LEVELS: ClassVar[FrozenSet[str]] = frozenset({"LOW", "UNKNOWN"})
+    
     def __init__(self):
         """Initialize action planning agent."""
         super().__init__("ActionPlanningAgent")
     
-    def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def process(self, input_data: Dict[str, Any], db: Optional[Session] = None) -> Dict[str, Any]:
         """Generate action plan based on risk assessment."""
         
         risk_level = input_data.get("risk_level", "UNKNOWN")
         location = input_data.get("location", "Unknown")
         category_risks = input_data.get("category_risks", {})
         
-        # Generate immediate actions
-        immediate_actions = self._generate_immediate_actions(risk_level, category_risks)
-        
-        # Generate short-term actions
-        short_term_actions = self._generate_short_term_actions(risk_level, category_risks)
-        
-        # Determine resource requirements
-        resources_needed = self._determine_resources(risk_level, category_risks)
-        
-        # Set timeline
-        timeline = self._set_timeline(risk_level)
+        immediate, short_term, resources = self._plan_catalogs(risk_level, category_risks)
         
         return {
             "location": location,
             "risk_level": risk_level,
             "action_plan": {
-                "immediate_actions": immediate_actions,
-                "short_term_actions": short_term_actions,
-                "timeline": timeline,
-                "resources_needed": resources_needed,
-                "coordination_required": self._requires_coordination(risk_level)
+                "immediate_actions": list(chain.from_iterable(immediate)),
+                "short_term_actions": list(chain.from_iterable(short_term)),
+                "timeline": self._set_timeline(risk_level),
+                "resources_needed": list(chain.from_iterable(resources)),
+                "coordination_required": risk_level in self._COORDINATION_LEVELS
             },
             "plan_priority": self._get_plan_priority(risk_level)
         }
     
-    def _generate_immediate_actions(self, risk_level: str, category_risks: Dict) -> List[str]:
-        """Generate immediate actions based on risk level."""
-        actions = []
-        
-        if risk_level in ["CRITICAL", "HIGH"]:
-            actions.extend([
-                "Activate emergency operations center",
-                "Alert emergency response teams",
-                "Issue public warnings"
-            ])
+    def _plan_catalogs(self, risk_level: str, category_risks: Dict) -> Tuple[List[tuple], List[tuple], List[tuple]]:
+        """Select the immediate, short-term and resource catalogs for a plan in one pass."""
         
-        # Specific category actions
-        if category_risks.get('typhoon', 0) > 0.6:
-            actions.extend([
-                "Issue typhoon warnings",
-                "Prepare evacuation orders",
-                "Secure critical infrastructure"
-            ])
+        immediate = []
+        short_term = []
+        resources = [_RESOURCES_BASE]
         
-        if category_risks.get('flooding', 0) > 0.6:
-            actions.extend([
-                "Deploy flood monitoring equipment",
-                "Check drainage systems",
-                "Prepare sandbags and barriers"
-            ])
+        if risk_level in self._COORDINATION_LEVELS:
+            immediate.append(_IMMEDIATE_HIGH)
+            short_term.append(_SHORT_TERM_HIGH)
+            resources.append(_RESOURCES_HIGH)
+        elif risk_level == "MODERATE":
+            short_term.append(_SHORT_TERM_MODERATE)
         
-        if not actions:
-            actions.append("Continue monitoring weather conditions")
+        for category, threshold, immediate_catalog, resource_catalog in _HAZARD_RULES:
+            if category_risks.get(category, 0.0) > threshold:
+                if immediate_catalog:
+                    immediate.append(immediate_catalog)
+                if resource_catalog:
+                    resources.append(resource_catalog)
         
-        return actions
-    
-    def _generate_short_term_actions(self, risk_level: str, category_risks: Dict) -> List[str]:
-        """Generate short-term actions (24-72 hours)."""
-        actions = []
-        
-        if risk_level in ["CRITICAL", "HIGH"]:
-            actions.extend([
-                "Conduct community briefings",
-                "Coordinate with neighboring LGUs",
-                "Prepare relief supplies"
-            ])
+        if not immediate:
+            immediate.append(_IMMEDIATE_DEFAULT)
         
-        if risk_level in ["MODERATE"]:
-            actions.extend([
-                "Review evacuation plans",
-                "Test communication systems",
-                "Update emergency contacts"
-            ])
+        short_term.append(_SHORT_TERM_DEFAULT)
         
-        actions.append("Monitor weather updates continuously")
-        return actions
+        return immediate, short_term, resources
     
-    def _determine_resources(self, risk_level: str, category_risks: Dict) -> List[str]:
-        """Determine required resources."""
-        resources = ["Emergency communications", "Weather monitoring equipment"]
+    def routine_plan(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the precomputed monitoring plan for routine inputs, else None.
         
-        if risk_level in ["CRITICAL", "HIGH"]:
-            resources.extend([
-                "Emergency response vehicles",
-                "Medical supplies",
-                "Evacuation transportation",
-                "Emergency shelters"
-            ])
+        Matches what process() produces for LOW/UNKNOWN risk when no hazard
+        rule triggers, without going through execute().
+        """
+        risk_level = input_data.get("risk_level", "UNKNOWN")
+        if risk_level not in self._ROUTINE_LEVELS:
+            return None
         
-        if category_risks.get('flooding', 0) > 0.5:
-            resources.extend(["Rescue boats", "Water pumps", "Sandbags"])
+        category_risks = input_data.get("category_risks", {})
+        for category, threshold, _, _ in _HAZARD_RULES:
+            if category_risks.get(category, 0.0) > threshold:
+                return None
         
-        return resources
+        return {
+            "location": input_data.get("location", "Unknown"),
+            "risk_level": risk_level,
+            "action_plan": {
+                "immediate_actions": list(_IMMEDIATE_DEFAULT),
+                "short_term_actions": list(_SHORT_TERM_DEFAULT),
+                "timeline": self._TIMELINES[risk_level],
+                "resources_needed": list(_RESOURCES_BASE),
+                "coordination_required": False
+            },
+            "plan_priority": self._PRIORITIES[risk_level]
+        }
     
     def _set_timeline(self, risk_level: str) -> str:
         """Set timeline based on risk level."""
-        timelines = {
-            "CRITICAL": "Immediate (0-6 hours)",
-            "HIGH": "Urgent (6-24 hours)",
-            "MODERATE": "Priority (24-48 hours)",
-            "LOW": "Routine (48+ hours)",
-            "UNKNOWN": "Monitor (ongoing)"
-        }
-        return timelines.get(risk_level, "Ongoing")
-    
-    def _requires_coordination(self, risk_level: str) -> bool:
-        """Determine if inter-agency coordination is required."""
-        return risk_level in ["CRITICAL", "HIGH"]
+        return self._TIMELINES.get(risk_level, "Ongoing")
     
     def _get_plan_priority(self, risk_level: str) -> int:
         """Get numerical priority (1=highest, 5=lowest)."""
-        priorities = {
-            "CRITICAL": 1,
-            "HIGH": 2,
-            "MODERATE": 3,
-            "LOW": 4,
-            "UNKNOWN": 5
-        }
-        return priorities.get(risk_level, 5)
+        return self._PRIORITIES.get(risk_level, 5)
 
 if __name__ == "__main__":
+    # Run from backend/ with: python -m app.agents.action_planning_agent
     # Test the action planning agent
     agent = ActionPlanningAgent()
     
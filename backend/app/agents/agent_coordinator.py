@@ -3,83 +3,289 @@ Agent Coordinator
 Orchestrates multiple agents and manages their interactions
 """
 
-import sys
-from pathlib import Path
-from typing import Dict, Any, List
+import asyncio
+import copy
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Iterator, List, Optional
 
-# Add backend to path for imports
-backend_dir = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(backend_dir))
+from cachetools import TTLCache
 
-from app.agents.weather_analysis_agent import WeatherAnalysisAgent
-from app.agents.risk_assessment_agent import RiskAssessmentAgent
-from app.agents.action_planning_agent import ActionPlanningAgent
+from app.agents.base_agent import BaseAgent, _execution_timestamp
+
+logger = logging.getLogger(__name__)
+
+@dataclass(slots=True)
+class AnalysisResult:
+    """Aggregated result of a full multi-agent analysis."""
+    location: str
+    weather_patterns: int
+    anomalies_detected: int
+    overall_risk: float
+    risk_level: str
+    plan_priority: int
+    weather_result: Dict[str, Any]
+    risk_result: Dict[str, Any]
+    action_result: Dict[str, Any]
+    all_successful: bool
+    agents_executed: int = 3
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Render the nested dictionary used in API responses."""
+        return {
+            "location": self.location,
+            "analysis_summary": {
+                "weather_patterns": self.weather_patterns,
+                "anomalies_detected": self.anomalies_detected,
+                "overall_risk": self.overall_risk,
+                "risk_level": self.risk_level,
+                "plan_priority": self.plan_priority
+            },
+            "detailed_results": {
+                "weather_analysis": self.weather_result,
+                "risk_assessment": self.risk_result,
+                "action_plan": self.action_result
+            },
+            "execution_summary": {
+                "agents_executed": self.agents_executed,
+                "all_successful": self.all_successful
+            }
+        }
 
 class AgentCoordinator:
-    """Coordinates multiple agents for comprehensive analysis."""
+    """Coordinates multiple agents for comprehensive analysis.
+    
+    Agents may be executed from several threads at once (see
+    run_full_analysis_batch), so they must not keep mutable per-run state
+    beyond the execution counter; DB-backed agents use thread-local sessions.
+    """
     
-    def __init__(self):
-        """Initialize agent coordinator."""
-        self.weather_agent = WeatherAnalysisAgent()
-        self.risk_agent = RiskAssessmentAgent()
-        self.action_agent = ActionPlanningAgent()
+    BATCH_POOL_SIZE = 16
+    
+    # Weather data changes on roughly 10-minute granularity
+    RESULT_CACHE_SIZE = 1024
+    RESULT_CACHE_TTL_SECONDS = 600
+    
+    def __init__(self,
+                 weather: Optional[BaseAgent] = None,
+                 risk: Optional[BaseAgent] = None,
+                 action: Optional[BaseAgent] = None):
+        """Initialize agent coordinator.
+        
+        Agents may be injected; defaults are imported lazily so importing this
+        module does not pull in the analysis services and their dependencies.
+        """
+        if weather is None:
+            from app.agents.weather_analysis_agent import WeatherAnalysisAgent
+            weather = WeatherAnalysisAgent()
+        if risk is None:
+            from app.agents.risk_assessment_agent import RiskAssessmentAgent
+            risk = RiskAssessmentAgent()
+        if action is None:
+            from app.agents.action_planning_agent import ActionPlanningAgent
+            action = ActionPlanningAgent()
+        
+        self.weather_agent = weather
+        self.risk_agent = risk
+        self.action_agent = action
+        
+        # Shared pool for the independent (I/O-bound) weather and risk agents;
+        # sized so every concurrent batch pipeline can run both at once
+        self._executor = ThreadPoolExecutor(
+            max_workers=2 * self.BATCH_POOL_SIZE,
+            thread_name_prefix="agent-coordinator"
+        )
+        
+        # Separate pool for per-location pipelines; each pipeline submits its
+        # agents to self._executor, so sharing one pool could deadlock
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.BATCH_POOL_SIZE,
+            thread_name_prefix="agent-coordinator-batch"
+        )
+        
+        # Successful weather/risk results keyed by (agent, location, input)
+        self._result_cache = TTLCache(
+            maxsize=self.RESULT_CACHE_SIZE,
+            ttl=self.RESULT_CACHE_TTL_SECONDS
+        )
+        self._cache_lock = threading.RLock()
+        
+        # Action plans served without running the action agent
+        self.fast_path_hits = 0
     
-    def run_full_analysis(self, location: str) -> Dict[str, Any]:
+    def run_full_analysis(self, location: str) -> AnalysisResult:
         """Run complete analysis using all agents."""
         
-        # Step 1: Weather Analysis
         weather_input = {
             "location": location,
             "analysis_type": "comprehensive"
         }
-        weather_result = self.weather_agent.execute(weather_input)
-        
-        # Step 2: Risk Assessment
         risk_input = {
             "location": location,
             "forecast_hours": 24
         }
-        risk_result = self.risk_agent.execute(risk_input)
         
-        # Step 3: Action Planning
-        action_input = {
+        # Steps 1 & 2: Weather Analysis and Risk Assessment run concurrently,
+        # neither consumes the other's output
+        weather_future = self._executor.submit(
+            self._cached_execute, self.weather_agent, weather_input
+        )
+        risk_future = self._executor.submit(
+            self._cached_execute, self.risk_agent, risk_input
+        )
+        weather_result = weather_future.result()
+        risk_result = risk_future.result()
+        
+        # Step 3: Action Planning (depends on risk assessment)
+        action_input = self._build_action_input(location, risk_result)
+        action_result = self._routine_action_result(action_input)
+        if action_result is None:
+            action_result = self.action_agent.execute(action_input)
+        
+        return self._combine_results(location, weather_result, risk_result, action_result)
+    
+    def run_full_analysis_batch(self, locations: List[str]) -> Iterator[AnalysisResult]:
+        """Run complete analysis for several locations, yielding results as they complete."""
+        
+        futures = [
+            self._pool.submit(self.run_full_analysis, location)
+            for location in locations
+        ]
+        
+        for future in as_completed(futures):
+            yield future.result()
+    
+    async def arun_full_analysis(self, location: str) -> AnalysisResult:
+        """Run complete analysis using all agents without blocking the event loop."""
+        
+        weather_input = {
             "location": location,
-            "risk_level": risk_result.get("risk_level", "UNKNOWN"),
-            "category_risks": risk_result.get("category_risks", {})
+            "analysis_type": "comprehensive"
+        }
+        risk_input = {
+            "location": location,
+            "forecast_hours": 24
         }
-        action_result = self.action_agent.execute(action_input)
         
-        # Combine results
+        # Dependency batch 1: independent agents, sharing the result cache
+        # with the synchronous entry points
+        weather_result, risk_result = await asyncio.gather(
+            asyncio.to_thread(self._cached_execute, self.weather_agent, weather_input),
+            asyncio.to_thread(self._cached_execute, self.risk_agent, risk_input)
+        )
+        
+        # Dependency batch 2: action planning consumes the risk assessment
+        action_input = self._build_action_input(location, risk_result)
+        action_result = self._routine_action_result(action_input)
+        if action_result is None:
+            action_result = await self.action_agent.aexecute(action_input)
+        
+        return self._combine_results(location, weather_result, risk_result, action_result)
+    
+    def run_full_analysis_sync(self, location: str) -> AnalysisResult:
+        """Synchronous wrapper around arun_full_analysis for non-async callers."""
+        return asyncio.run(self.arun_full_analysis(location))
+    
+    def invalidate(self, location: str) -> None:
+        """Drop cached weather/risk results for a location to force a refresh."""
+        with self._cache_lock:
+            stale_keys = [key for key in self._result_cache if key[1] == location]
+            for key in stale_keys:
+                self._result_cache.pop(key, None)
+    
+    def _cached_execute(self, agent, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute an agent, reusing a recent successful result for the same input.
+        
+        Callers get deep copies, so nested results never alias the cache. A
+        hit keeps the original run's execution_id/executed_at and is marked
+        "cached": True.
+        """
+        key = (
+            agent.agent_name,
+            input_data.get("location"),
+            json.dumps(input_data, sort_keys=True, default=str)
+        )
+        
+        with self._cache_lock:
+            cached = self._result_cache.get(key)
+        if cached is not None:
+            hit = copy.deepcopy(cached)
+            hit["cached"] = True
+            return hit
+        
+        result = agent.execute(input_data)
+        
+        # Never cache failures; the next call should retry
+        if result.get("status") == "success":
+            with self._cache_lock:
+                self._result_cache[key] = result
+        
+        return copy.deepcopy(result)
+    
+    def _routine_action_result(self, action_input: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fast path: return the precomputed plan for low/unknown risk, else None."""
+        plan = self.action_agent.routine_plan(action_input)
+        if plan is None:
+            return None
+        
+        with self._cache_lock:
+            self.fast_path_hits += 1
+            hits = self.fast_path_hits
+        logger.debug(f"Routine action plan fast path hit (total: {hits})")
+        
+        # Same metadata as BaseAgent._success_result; no execute() run, so no id
+        plan.update({
+            "agent_name": self.action_agent.agent_name,
+            "execution_id": None,
+            "executed_at": _execution_timestamp(),
+            "status": "success",
+            "fast_path": True
+        })
+        return plan
+    
+    def _build_action_input(self, location: str, risk_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build action planning input from a risk assessment result."""
         return {
             "location": location,
-            "analysis_summary": {
-                "weather_patterns": weather_result.get("patterns_count", 0),
-                "anomalies_detected": weather_result.get("anomalies_count", 0),
-                "overall_risk": risk_result.get("overall_risk", 0),
-                "risk_level": risk_result.get("risk_level", "UNKNOWN"),
-                "plan_priority": action_result.get("plan_priority", 5)
-            },
-            "detailed_results": {
-                "weather_analysis": weather_result,
-                "risk_assessment": risk_result,
-                "action_plan": action_result
-            },
-            "execution_summary": {
-                "agents_executed": 3,
-                "all_successful": all(
-                    result.get("status") == "success" 
-                    for result in [weather_result, risk_result, action_result]
-                )
-            }
+            "risk_level": risk_result.get("risk_level", "UNKNOWN"),
+            "category_risks": risk_result.get("category_risks", {})
         }
+    
+    def _combine_results(self,
+                         location: str,
+                         weather_result: Dict[str, Any],
+                         risk_result: Dict[str, Any],
+                         action_result: Dict[str, Any]) -> AnalysisResult:
+        """Combine individual agent results into a single analysis result."""
+        return AnalysisResult(
+            location=location,
+            weather_patterns=weather_result.get("patterns_count", 0),
+            anomalies_detected=weather_result.get("anomalies_count", 0),
+            overall_risk=risk_result.get("overall_risk", 0),
+            risk_level=risk_result.get("risk_level", "UNKNOWN"),
+            plan_priority=action_result.get("plan_priority", 5),
+            weather_result=weather_result,
+            risk_result=risk_result,
+            action_result=action_result,
+            # execute() and the routine fast path always set "status"
+            all_successful=(
+                weather_result["status"] == "success"
+                and risk_result["status"] == "success"
+                and action_result["status"] == "success"
+            )
+        )
 
 if __name__ == "__main__":
+    # Run from backend/ with: python -m app.agents.agent_coordinator
     # Test the agent coordinator
     coordinator = AgentCoordinator()
     
     result = coordinator.run_full_analysis("Manila,PH")
     
-    print(f"Location: {result['location']}")
-    print(f"Risk Level: {result['analysis_summary']['risk_level']}")
-    print(f"Agents Executed: {result['execution_summary']['agents_executed']}")
-    print(f"All Successful: {result['execution_summary']['all_successful']}")
\ No newline at end of file
+    print(f"Location: {result.location}")
+    print(f"Risk Level: {result.risk_level}")
+    print(f"Agents Executed: {result.agents_executed}")
+    print(f"All Successful: {result.all_successful}")
\ No newline at end of file
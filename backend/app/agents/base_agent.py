@@ -3,52 +3,118 @@ Base Agent Class for WeatherWise
 Foundation for all specialized agents
 """
 
+import asyncio
+import itertools
 import logging 
-from abc import ABC, abstractmethod
+import time
 from typing import Dict, List, Any, Optional
-from datetime import datetime
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
+# (epoch second, ISO string) of the last formatted execution timestamp
+_timestamp_cache = (0, "")
 
-class BaseAgent(ABC):
+
+def _execution_timestamp() -> str:
+    """Return the current UTC time as ISO text, formatted at most once per second."""
+    global _timestamp_cache
+    now_sec = int(time.time())
+    cached_sec, cached_text = _timestamp_cache
+    if now_sec != cached_sec:
+        cached_text = datetime.fromtimestamp(now_sec, timezone.utc).isoformat()
+        _timestamp_cache = (now_sec, cached_text)
+    return cached_text
+
+
+class BaseAgent:
     """Base class for all WeatherWise agents."""
 
+    __slots__ = ("agent_name", "created_at", "_counter", "_last_execution_id")
+
+    def __init_subclass__(cls, **kwargs):
+        """Require concrete agents to implement process() at class definition."""
+        super().__init_subclass__(**kwargs)
+        if cls.process is BaseAgent.process:
+            raise TypeError(f"{cls.__name__} must override process")
+
     def __init__(self, agent_name: str):
         """Initialize base agent."""
         self.agent_name = agent_name
         self.created_at = datetime.now()
-        self.execution_count = 0
+        self._counter = itertools.count(1)
+        self._last_execution_id = 0
         logger.info(f"Agent {self.agent_name} initialized")
 
-    @abstractmethod
-    def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process input data and return results."""
-        pass
+    def process(self, input_data: Dict[str, Any], db: Optional[Session] = None) -> Dict[str, Any]:
+        """Process input data and return results.
 
-    def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        Agents that query the database use db when given (e.g. the request's
+        session) and otherwise open a short-lived session for the call.
+        """
+        raise NotImplementedError
+
+    async def aprocess(self, input_data: Dict[str, Any], db: Optional[Session] = None) -> Dict[str, Any]:
+        """Async process hook. Defaults to running process() in a worker thread."""
+        return await asyncio.to_thread(self.process, input_data, db)
+
+    def routine_plan(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Precomputed result for routine inputs, served without execute(); None runs the agent."""
+        return None
+
+    def execute(self, input_data: Dict[str, Any], db: Optional[Session] = None) -> Dict[str, Any]:
         """Execute agent with logging and error handling."""
-        self.execution_count += 1
+        execution_id = self._next_execution_id()
 
         try:
-            logger.info(f"Executing {self.agent_name} (run #{self.execution_count})")
-            result = self.process(input_data)
+            logger.debug("Executing %s (run #%d)", self.agent_name, execution_id)
+            result = self.process(input_data, db)
+            return self._success_result(result, execution_id)
+        
+        except Exception as e:
+            return self._error_result(e, execution_id)
 
-            result.update({
-                "agent_name": self.agent_name,
-                "execution_id": self.execution_count,
-                "executed_at": datetime.now().isoformat(),
-                "status": "success"
-            })
+    async def aexecute(self, input_data: Dict[str, Any], db: Optional[Session] = None) -> Dict[str, Any]:
+        """Execute agent asynchronously with logging and error handling."""
+        execution_id = self._next_execution_id()
+
+        try:
+            logger.debug("Executing %s async (run #%d)", self.agent_name, execution_id)
+            result = await self.aprocess(input_data, db)
+            return self._success_result(result, execution_id)
 
-            return result
-        
         except Exception as e:
-            logger.error(f"Agent {self.agent_name} failed: {e}")
-            return {
-                "agent_name": self.agent_name,
-                "execution_id": self.execution_count,
-                "executed_at": datetime.now().isoformat(),
-                "status": "error",
-                "error": str(e)
-            }
\ No newline at end of file
+            return self._error_result(e, execution_id)
+
+    @property
+    def execution_count(self) -> int:
+        """Number of executions started (approximate while runs are in flight)."""
+        return self._last_execution_id
+
+    def _next_execution_id(self) -> int:
+        """Allocate a unique execution id; count.__next__ is atomic under the GIL."""
+        execution_id = next(self._counter)
+        self._last_execution_id = execution_id
+        return execution_id
+
+    def _success_result(self, result: Dict[str, Any], execution_id: int) -> Dict[str, Any]:
+        """Attach execution metadata to a successful result."""
+        result.update({
+            "agent_name": self.agent_name,
+            "execution_id": execution_id,
+            "executed_at": _execution_timestamp(),
+            "status": "success"
+        })
+        return result
+
+    def _error_result(self, error: Exception, execution_id: int) -> Dict[str, Any]:
+        """Build the result returned when an agent run fails."""
+        logger.error(f"Agent {self.agent_name} failed: {error}")
+        return {
+            "agent_name": self.agent_name,
+            "execution_id": execution_id,
+            "executed_at": _execution_timestamp(),
+            "status": "error",
+            "error": str(error)
+        }
\ No newline at end of file
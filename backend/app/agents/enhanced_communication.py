@@ -4,19 +4,122 @@ Adds pub/sub messaging and workflow capabilities to your existing agents
 """
 
 import asyncio
-import json
+import heapq
+import itertools
+import os
+import time
 import uuid
 import logging
-from typing import Dict, Any, List, Callable, Optional
-from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, List, Callable, Optional, Tuple
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
+import orjson
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import column, func, insert, table, text
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Lightweight table construct for bulk message inserts; Core insert() lets the
+# driver send a whole batch as multi-row INSERT ... VALUES statements
+agent_messages_table = table(
+    "agent_messages",
+    column("id"),
+    column("message_type"),
+    column("sender_agent"),
+    column("recipient_agent"),
+    column("workflow_id"),
+    column("correlation_id"),
+    column("payload"),
+    column("priority"),
+    column("status"),
+)
+
+agent_executions_table = table(
+    "agent_executions",
+    column("agent_name"),
+    column("execution_type"),
+    column("workflow_id"),
+    column("input_data"),
+    column("output_data"),
+    column("execution_status"),
+    column("execution_time_ms"),
+    column("error_message"),
+    column("completed_at"),
+)
+
+# Workflow/execution statements are built once at import; reusing the same
+# TextClause lets SQLAlchemy hit its compiled-statement cache on every call
+_START_WORKFLOW_SQL = text(
+    "SELECT start_agent_workflow(:workflow_type, :initiator, :context, :location, 3)"
+)
+_COMPLETE_WORKFLOW_SQL = text(
+    "SELECT complete_agent_workflow(:workflow_id, :status)"
+)
+_LOG_EXECUTION_SQL = text("""
+    SELECT log_agent_execution(
+        :agent_name, :execution_type, :workflow_id, :input_data,
+        :output_data, :status, :execution_time_ms, :error_message
+    )
+""")
+
+# Execution log plus its follow-up message in a single statement (one round
+# trip instead of a log call followed by a separate message write). When the
+# payload embeds the execution output under :output_key, the server splices
+# it back in with jsonb_build_object so the blob is encoded and sent once
+_LOG_AND_EMIT_SQL = text("""
+    SELECT log_and_emit(
+        :agent_name, :execution_type, :workflow_id, :input_data, :output_data,
+        :execution_time_ms, :message_id, :message_type, :recipient_agent,
+        :correlation_id, :payload, :priority, :output_key
+    )
+""")
+
+_RECENT_MESSAGES_SQL = text("""
+    SELECT id, message_type, sender_agent, recipient_agent, workflow_id,
+           correlation_id, payload, priority, status, sent_at
+    FROM agent_messages
+    ORDER BY sent_at DESC
+    LIMIT :limit
+""")
+
+# JSON columns are bound as text; orjson encodes straight to UTF-8 bytes and
+# handles datetimes and numpy values that show up in analysis payloads
+_DUMPS_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a payload/context dict to JSON text."""
+    return orjson.dumps(obj, option=_DUMPS_OPTIONS).decode()
+
+
+# Core agents are synchronous (DB queries, model calls); their execute() runs
+# on this shared pool so concurrent workflows overlap instead of blocking the loop
+CORE_AGENT_POOL_SIZE = 8
+_core_agent_pool = ThreadPoolExecutor(
+    max_workers=CORE_AGENT_POOL_SIZE, thread_name_prefix="core-agent"
+)
+
+
+# Message ids are cut from one os.urandom() read per batch instead of a
+# separate uuid4() (and randomness syscall) for every message
+_UUID_BATCH_SIZE = 256
+_uuid_buffer: List[str] = []
+
+
+def _new_uuid() -> str:
+    """Return a random (version 4) UUID string from the pre-generated batch."""
+    if not _uuid_buffer:
+        raw = os.urandom(16 * _UUID_BATCH_SIZE)
+        _uuid_buffer.extend(
+            str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, len(raw), 16)
+        )
+    return _uuid_buffer.pop()
+
 class MessageType(Enum):
     WEATHER_UPDATE = "weather_update"
     RISK_ASSESSMENT = "risk_assessment"
@@ -26,7 +129,9 @@ class MessageType(Enum):
     WORKFLOW_START = "workflow_start"
     WORKFLOW_COMPLETE = "workflow_complete"
 
-@dataclass
+# Slotted and immutable: no per-instance __dict__, and a message can be shared
+# by every subscriber and the persistence buffer without defensive copies
+@dataclass(slots=True, frozen=True)
 class AgentMessage:
     message_id: str
     message_type: MessageType
@@ -34,87 +139,226 @@ class AgentMessage:
     recipient_agent: str
     payload: Dict[str, Any]
     priority: int  # 1=highest, 5=lowest
-    timestamp: datetime
+    timestamp: float  # event loop monotonic time; sent_at is stamped by the database
     correlation_id: str = None
     workflow_id: str = None
 
+@dataclass(slots=True)
+class _BusTransaction:
+    """Session of one open AgentEventBus.transaction(); inactive once it exits."""
+    session: Session
+    active: bool = True
+
 class AgentEventBus:
     """Event bus for agent-to-agent communication."""
     
+    # Persisted messages are buffered and written in batches: a flush happens
+    # once FLUSH_BATCH_SIZE messages are pending or FLUSH_INTERVAL_SECONDS pass
+    FLUSH_BATCH_SIZE = 100
+    FLUSH_INTERVAL_SECONDS = 0.01
+    
+    # Messages at or above this urgency (priority 1-2) are flushed right away
+    # instead of waiting out the interval; anything buffered goes with them
+    FAST_PATH_PRIORITY = 2
+    
     def __init__(self, db_session: Session):
         self.db = db_session
-        self.subscribers: Dict[MessageType, List[Callable]] = {}
-        self.message_history: List[AgentMessage] = []
+        # Handlers keyed by (message_type, recipient); recipient None means every
+        # recipient. Tuples are rebuilt on subscribe so publish can iterate them as-is
+        self.subscribers: Dict[Tuple[MessageType, Optional[str]], Tuple[Callable, ...]] = {}
         self.active_workflows: Dict[str, Dict] = {}
+        self._pending: List[AgentMessage] = []
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        # The transaction() open in the current task, if any. Tasks started
+        # inside a block inherit it, hence the active flag checked on use
+        self._transaction: ContextVar[Optional[_BusTransaction]] = ContextVar(
+            "agent_event_bus_transaction", default=None
+        )
     
-    def subscribe(self, message_type: MessageType, handler: Callable):
-        """Subscribe to specific message types."""
-        if message_type not in self.subscribers:
-            self.subscribers[message_type] = []
-        self.subscribers[message_type].append(handler)
-        logger.info(f"Handler subscribed to {message_type.value}")
+    def subscribe(self, message_type: MessageType, handler: Callable, recipient: Optional[str] = None):
+        """Subscribe to a message type, optionally only for messages addressed to recipient."""
+        key = (message_type, recipient)
+        self.subscribers[key] = self.subscribers.get(key, ()) + (handler,)
+        logger.info(f"Handler subscribed to {message_type.value} for {recipient or 'all recipients'}")
     
-    async def publish(self, message: AgentMessage):
-        """Publish message to all subscribers and store in database."""
-        self.message_history.append(message)
+    async def publish(self, message: AgentMessage, persist: bool = True):
+        """Publish message to all subscribers and queue it for database storage.
         
-        # Store message in database
-        await self._store_message_in_db(message)
+        Persistence is off the delivery path: the message is only buffered
+        here and written by the background flusher, so subscribers (e.g. an
+        ACTION_REQUIRED handler) never wait on a database round trip. Pass
+        persist=False when the caller has already stored the message.
+        """
+        # Queue message for batched persistence (never awaited here)
+        if persist:
+            self._enqueue_for_storage(message)
         
-        # Notify subscribers
-        if message.message_type in self.subscribers:
-            for handler in self.subscribers[message.message_type]:
-                try:
-                    await handler(message)
-                except Exception as e:
-                    logger.error(f"Error in message handler: {e}")
+        # Notify the addressee's and wildcard subscribers concurrently; one
+        # failing handler does not stop the rest
+        handlers = (
+            self.subscribers.get((message.message_type, message.recipient_agent), ())
+            + self.subscribers.get((message.message_type, None), ())
+        )
+        if handlers:
+            await asyncio.gather(
+                *(self._safe_call(handler, message) for handler in handlers),
+                return_exceptions=True
+            )
     
-    async def _store_message_in_db(self, message: AgentMessage):
-        """Store message in database for persistence."""
+    async def _safe_call(self, handler: Callable, message: AgentMessage):
+        """Run one subscriber, logging its failure instead of propagating it."""
         try:
-            insert_sql = text("""
-                INSERT INTO agent_messages (
-                    id, message_type, sender_agent, recipient_agent, 
-                    workflow_id, correlation_id, payload, priority, status
-                ) VALUES (
-                    :message_id, :message_type, :sender_agent, :recipient_agent,
-                    :workflow_id, :correlation_id, :payload, :priority, 'sent'
-                )
-            """)
-            
-            self.db.execute(insert_sql, {
-                "message_id": message.message_id,
-                "message_type": message.message_type.value,
-                "sender_agent": message.sender_agent,
-                "recipient_agent": message.recipient_agent,
-                "workflow_id": message.workflow_id,
-                "correlation_id": message.correlation_id,
-                "payload": json.dumps(message.payload),
-                "priority": message.priority
-            })
+            await handler(message)
+        except Exception as e:
+            logger.error(f"Error in message handler {getattr(handler, '__qualname__', handler)}: {e}")
+    
+    async def flush(self):
+        """Write all pending messages to the database in one transaction."""
+        batch, self._pending = self._pending, []
+        if batch:
+            self._store_messages_in_db(batch)
+    
+    async def recent_messages(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return the most recently sent messages, newest first, from the database."""
+        await self.flush()
+        rows = self.db.execute(_RECENT_MESSAGES_SQL, {"limit": limit}).mappings()
+        return [dict(row) for row in rows]
+    
+    async def close(self):
+        """Flush pending messages and stop the background flusher."""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """Group the current task's workflow/execution writes into one unit of work.
+        
+        Each block gets a session of its own, so concurrent workflows never
+        share a transaction: writes run in savepoints and the single commit
+        (one fsync) happens when the outermost block of this task exits. Nested
+        blocks join the outer one. Workflow starts and buffered messages are
+        not part of it; they are committed on the bus's own session.
+        """
+        current = self._transaction.get()
+        if current is not None and current.active:
+            yield self
+            return
+        
+        transaction = _BusTransaction(self._new_session())
+        token = self._transaction.set(transaction)
+        try:
+            yield self
+        except BaseException:
+            transaction.session.rollback()
+            raise
+        else:
+            try:
+                transaction.session.commit()
+            except Exception as e:
+                logger.error(f"Failed to commit agent transaction: {e}")
+                transaction.session.rollback()
+        finally:
+            transaction.active = False
+            self._transaction.reset(token)
+            transaction.session.close()
+    
+    def _new_session(self) -> Session:
+        """Open a session on the bus's database for one transaction() block."""
+        return Session(bind=self.db.get_bind(), expire_on_commit=False)
+    
+    @contextmanager
+    def _write_scope(self) -> Iterator[Session]:
+        """Scope a write: defer it to this task's open transaction(), or commit it now."""
+        transaction = self._transaction.get()
+        if transaction is not None and transaction.active:
+            with transaction.session.begin_nested():
+                yield transaction.session
+            return
+        
+        with self._commit_scope() as session:
+            yield session
+    
+    @contextmanager
+    def _commit_scope(self) -> Iterator[Session]:
+        """Scope a write on the bus's own session, committed immediately."""
+        try:
+            yield self.db
             self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+    
+    def _enqueue_for_storage(self, message: AgentMessage):
+        """Add a message to the write buffer, starting the flusher if idle."""
+        self._pending.append(message)
+        
+        if self._flush_task is None or self._flush_task.done():
+            self._batch_ready = asyncio.Event()
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        
+        if message.priority <= self.FAST_PATH_PRIORITY or len(self._pending) >= self.FLUSH_BATCH_SIZE:
+            self._batch_ready.set()
+    
+    async def _flush_loop(self):
+        """Flush buffered messages until the buffer is drained."""
+        while self._pending:
+            if len(self._pending) < self.FLUSH_BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(
+                        self._batch_ready.wait(), timeout=self.FLUSH_INTERVAL_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_ready.clear()
+            await self.flush()
+    
+    def _store_messages_in_db(self, messages: List[AgentMessage]):
+        """Store a batch of messages in the database with a single commit.
+        
+        The buffer mixes messages from every workflow, so the batch is never
+        tied to one workflow's transaction.
+        """
+        try:
+            with self._commit_scope() as session:
+                session.execute(insert(agent_messages_table), [
+                    {
+                        "id": message.message_id,
+                        "message_type": message.message_type.value,
+                        "sender_agent": message.sender_agent,
+                        "recipient_agent": message.recipient_agent,
+                        "workflow_id": message.workflow_id,
+                        "correlation_id": message.correlation_id,
+                        "payload": _dumps(message.payload),
+                        "priority": message.priority,
+                        "status": "sent"
+                    }
+                    for message in messages
+                ])
             
         except Exception as e:
-            logger.error(f"Failed to store message in database: {e}")
-            self.db.rollback()
+            logger.error(f"Failed to store {len(messages)} messages in database: {e}")
     
     def start_workflow(self, workflow_type: str, initiator: str, context: Dict, location: str = None) -> str:
         """Start a new multi-agent workflow."""
-        workflow_id = str(uuid.uuid4())
+        workflow_id = _new_uuid()
         
         try:
-            # Use the database function we created
-            result = self.db.execute(text("""
-                SELECT start_agent_workflow(:workflow_type, :initiator, :context, :location, 3)
-            """), {
-                "workflow_type": workflow_type,
-                "initiator": initiator,
-                "context": json.dumps(context),
-                "location": location
-            })
-            
-            db_workflow_id = result.scalar()
-            self.db.commit()
+            # Use the database function we created; committed right away so
+            # running workflows are visible to other connections
+            with self._commit_scope() as session:
+                result = session.execute(_START_WORKFLOW_SQL, {
+                    "workflow_type": workflow_type,
+                    "initiator": initiator,
+                    "context": _dumps(context),
+                    "location": location
+                })
+                db_workflow_id = result.scalar()
             
             # Store in memory for quick access
             self.active_workflows[workflow_id] = {
@@ -135,33 +379,34 @@ class AgentEventBus:
             
         except Exception as e:
             logger.error(f"Failed to start workflow: {e}")
-            self.db.rollback()
             return None
     
-    def complete_workflow(self, workflow_id: str, status: str = "completed"):
-        """Complete a workflow."""
+    async def complete_workflow(self, workflow_id: str, status: str = "completed"):
+        """Complete a workflow and evict it from the in-memory registry.
+        
+        Buffered messages are flushed first so a workflow is never marked
+        finished while its messages are still waiting to be written.
+        """
         if workflow_id in self.active_workflows:
             workflow = self.active_workflows[workflow_id]
             
             try:
+                await self.flush()
+                
                 # Update database
-                self.db.execute(text("""
-                    SELECT complete_agent_workflow(:workflow_id, :status)
-                """), {
-                    "workflow_id": workflow["db_id"],
-                    "status": status
-                })
-                self.db.commit()
+                with self._write_scope() as session:
+                    session.execute(_COMPLETE_WORKFLOW_SQL, {
+                        "workflow_id": workflow["db_id"],
+                        "status": status
+                    })
                 
-                # Update in-memory status
-                workflow["status"] = status
-                workflow["completed_at"] = datetime.now(timezone.utc)
+                # Completed workflows live on in the database only
+                self.active_workflows.pop(workflow_id, None)
                 
                 logger.info(f"Completed workflow {workflow_id} with status: {status}")
                 
             except Exception as e:
                 logger.error(f"Failed to complete workflow: {e}")
-                self.db.rollback()
 
 class EnhancedBaseAgent:
     """Enhanced base agent with communication capabilities."""
@@ -173,6 +418,20 @@ class EnhancedBaseAgent:
         self.workflow_context = {}
         self.execution_count = 0
         
+        # Priority inbox: min-heap of (priority, seq, message); seq keeps
+        # equal priorities in arrival order and never compares messages
+        self._inbox: List[Tuple[int, int, AgentMessage]] = []
+        self._inbox_seq = itertools.count()
+        self._consumer_task: Optional[asyncio.Task] = None
+        
+        # Message type -> bound handle_<type> method, resolved once here
+        # instead of formatting and looking up the name on every message
+        self._dispatch: Dict[MessageType, Callable] = {
+            message_type: getattr(self, f"handle_{message_type.value}")
+            for message_type in MessageType
+            if hasattr(self, f"handle_{message_type.value}")
+        }
+        
         # Subscribe to relevant message types
         self.setup_subscriptions()
         
@@ -182,6 +441,26 @@ class EnhancedBaseAgent:
         """Setup message subscriptions for this agent. Override in subclasses."""
         pass
     
+    def create_message(self, 
+                       recipient: str, 
+                       message_type: MessageType, 
+                       payload: Dict[str, Any],
+                       priority: int = 3,
+                       correlation_id: str = None,
+                       workflow_id: str = None) -> AgentMessage:
+        """Build a message from this agent without publishing it."""
+        return AgentMessage(
+            message_id=_new_uuid(),
+            message_type=message_type,
+            sender_agent=self.agent_name,
+            recipient_agent=recipient,
+            payload=payload,
+            priority=priority,
+            timestamp=asyncio.get_running_loop().time(),
+            correlation_id=correlation_id,
+            workflow_id=workflow_id
+        )
+    
     async def send_message(self, 
                           recipient: str, 
                           message_type: MessageType, 
@@ -191,16 +470,8 @@ class EnhancedBaseAgent:
                           workflow_id: str = None):
         """Send message to another agent."""
         
-        message = AgentMessage(
-            message_id=str(uuid.uuid4()),
-            message_type=message_type,
-            sender_agent=self.agent_name,
-            recipient_agent=recipient,
-            payload=payload,
-            priority=priority,
-            timestamp=datetime.now(timezone.utc),
-            correlation_id=correlation_id,
-            workflow_id=workflow_id
+        message = self.create_message(
+            recipient, message_type, payload, priority, correlation_id, workflow_id
         )
         
         await self.event_bus.publish(message)
@@ -208,18 +479,44 @@ class EnhancedBaseAgent:
         return message.message_id
     
     async def handle_message(self, message: AgentMessage):
-        """Handle incoming messages. Override in subclasses."""
-        if message.recipient_agent != self.agent_name:
-            return
-        
+        """Queue incoming messages by priority for the inbox consumer."""
+        heapq.heappush(self._inbox, (message.priority, next(self._inbox_seq), message))
+        if self._consumer_task is None or self._consumer_task.done():
+            self._consumer_task = asyncio.create_task(self._consume_inbox())
+    
+    @property
+    def has_pending_messages(self) -> bool:
+        """Whether the inbox consumer still has messages to process."""
+        return self._consumer_task is not None and not self._consumer_task.done()
+    
+    async def drain_inbox(self):
+        """Wait until every queued message has been processed."""
+        while self.has_pending_messages:
+            await self._consumer_task
+    
+    async def _consume_inbox(self):
+        """Process queued messages, most urgent (lowest priority value) first."""
+        while self._inbox:
+            _, _, message = heapq.heappop(self._inbox)
+            try:
+                await self.dispatch_message(message)
+            except Exception as e:
+                logger.error(f"{self.agent_name} failed to handle {message.message_type.value}: {e}")
+    
+    async def dispatch_message(self, message: AgentMessage):
+        """Handle a message taken from the inbox. Override in subclasses."""
         logger.info(f"{self.agent_name} received {message.message_type.value} from {message.sender_agent}")
         
         # Process message based on type
-        handler_name = f"handle_{message.message_type.value}"
-        if hasattr(self, handler_name):
-            handler = getattr(self, handler_name)
+        handler = self._dispatch.get(message.message_type)
+        if handler:
             await handler(message)
     
+    async def execute_core(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the wrapped core agent off the event loop on the shared pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_core_agent_pool, self.core_agent.execute, input_data)
+    
     async def log_execution(self, 
                           execution_type: str,
                           input_data: Dict,
@@ -231,24 +528,18 @@ class EnhancedBaseAgent:
         """Log agent execution to database."""
         
         try:
-            result = self.event_bus.db.execute(text("""
-                SELECT log_agent_execution(
-                    :agent_name, :execution_type, :workflow_id, :input_data,
-                    :output_data, :status, :execution_time_ms, :error_message
-                )
-            """), {
-                "agent_name": self.agent_name,
-                "execution_type": execution_type,
-                "workflow_id": workflow_id,
-                "input_data": json.dumps(input_data),
-                "output_data": json.dumps(output_data) if output_data else None,
-                "status": status,
-                "execution_time_ms": execution_time_ms,
-                "error_message": error_message
-            })
-            
-            execution_id = result.scalar()
-            self.event_bus.db.commit()
+            with self.event_bus._write_scope() as session:
+                result = session.execute(_LOG_EXECUTION_SQL, {
+                    "agent_name": self.agent_name,
+                    "execution_type": execution_type,
+                    "workflow_id": workflow_id,
+                    "input_data": _dumps(input_data),
+                    "output_data": _dumps(output_data) if output_data else None,
+                    "status": status,
+                    "execution_time_ms": execution_time_ms,
+                    "error_message": error_message
+                })
+                execution_id = result.scalar()
             
             self.execution_count += 1
             logger.info(f"{self.agent_name} execution logged: {execution_id}")
@@ -257,9 +548,98 @@ class EnhancedBaseAgent:
             
         except Exception as e:
             logger.error(f"Failed to log execution for {self.agent_name}: {e}")
-            self.event_bus.db.rollback()
             return None
 
+    async def log_executions(self, 
+                             execution_type: str,
+                             executions: List[Tuple[Dict, Dict]],
+                             execution_time_ms: int = None,
+                             workflow_id: str = None):
+        """Log a batch of (input_data, output_data) executions with one multi-row insert."""
+        try:
+            with self.event_bus._write_scope() as session:
+                session.execute(
+                    insert(agent_executions_table).values(completed_at=func.now()),
+                    [
+                        {
+                            "agent_name": self.agent_name,
+                            "execution_type": execution_type,
+                            "workflow_id": workflow_id,
+                            "input_data": _dumps(input_data),
+                            "output_data": _dumps(output_data),
+                            "execution_status": "failed" if output_data.get("status") == "error" else "completed",
+                            "execution_time_ms": execution_time_ms,
+                            "error_message": output_data.get("error")
+                        }
+                        for input_data, output_data in executions
+                    ]
+                )
+            
+            self.execution_count += len(executions)
+            logger.info(f"{self.agent_name} logged {len(executions)} executions")
+            
+        except Exception as e:
+            logger.error(f"Failed to log {len(executions)} executions for {self.agent_name}: {e}")
+    
+    async def log_and_emit(self, 
+                           execution_type: str,
+                           input_data: Dict,
+                           output_data: Dict = None,
+                           execution_time_ms: int = None,
+                           workflow_id: str = None,
+                           message: Optional[AgentMessage] = None):
+        """Log a completed execution and store its follow-up message in one round trip.
+        
+        Without a message this is just log_execution. If the combined write
+        fails the message is still published and goes through the normal
+        buffered persistence path instead.
+        """
+        if message is None:
+            return await self.log_execution(
+                execution_type, input_data, output_data, execution_time_ms, workflow_id
+            )
+        
+        # Payload entry that is the output itself is rebuilt server-side
+        output_key = None
+        if output_data:
+            output_key = next(
+                (key for key, value in message.payload.items() if value is output_data), None
+            )
+        payload = message.payload
+        if output_key:
+            payload = {key: value for key, value in payload.items() if key != output_key}
+        
+        execution_id = None
+        try:
+            with self.event_bus._write_scope() as session:
+                result = session.execute(_LOG_AND_EMIT_SQL, {
+                    "agent_name": self.agent_name,
+                    "execution_type": execution_type,
+                    "workflow_id": workflow_id,
+                    "input_data": _dumps(input_data),
+                    "output_data": _dumps(output_data) if output_data else None,
+                    "execution_time_ms": execution_time_ms,
+                    "message_id": message.message_id,
+                    "message_type": message.message_type.value,
+                    "recipient_agent": message.recipient_agent,
+                    "correlation_id": message.correlation_id,
+                    "payload": _dumps(payload),
+                    "priority": message.priority,
+                    "output_key": output_key
+                })
+                execution_id = result.scalar()
+            
+            self.execution_count += 1
+            logger.info(f"{self.agent_name} execution logged: {execution_id}")
+            
+        except Exception as e:
+            logger.error(f"Failed to log execution for {self.agent_name}: {e}")
+        
+        await self.event_bus.publish(message, persist=execution_id is None)
+        logger.info(f"{self.agent_name} sent {message.message_type.value} to {message.recipient_agent}")
+        
+        return str(execution_id) if execution_id else None
+
 # Enhanced versions of your existing agents
 class EnhancedWeatherAnalysisAgent(EnhancedBaseAgent):
     """Enhanced weather analysis agent with collaboration capabilities."""
@@ -273,46 +653,34 @@ class EnhancedWeatherAnalysisAgent(EnhancedBaseAgent):
     
     def setup_subscriptions(self):
         """Subscribe to relevant message types."""
-        self.event_bus.subscribe(MessageType.WEATHER_UPDATE, self.handle_message)
-        self.event_bus.subscribe(MessageType.SYSTEM_ALERT, self.handle_message)
-        self.event_bus.subscribe(MessageType.WORKFLOW_START, self.handle_message)
+        self.event_bus.subscribe(MessageType.WEATHER_UPDATE, self.handle_message, recipient=self.agent_name)
+        self.event_bus.subscribe(MessageType.SYSTEM_ALERT, self.handle_message, recipient=self.agent_name)
+        self.event_bus.subscribe(MessageType.WORKFLOW_START, self.handle_message, recipient=self.agent_name)
     
     async def analyze_with_collaboration(self, location: str, workflow_id: str = None):
         """Perform analysis and notify other agents."""
-        import time
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
         try:
             # Perform standard analysis using your existing agent
             input_data = {"location": location, "analysis_type": "comprehensive"}
-            analysis_result = self.core_agent.execute(input_data)
+            analysis_result = await self.execute_core(input_data)
             
-            execution_time_ms = int((time.time() - start_time) * 1000)
+            execution_time_ms = (time.perf_counter_ns() - start_time) // 1_000_000
             
-            # Log execution
-            await self.log_execution(
+            # Notify risk assessment agent if significant patterns found
+            message = self._risk_notification(location, analysis_result, workflow_id)
+            
+            # Log execution together with any notification
+            await self.log_and_emit(
                 execution_type="collaborative_analysis",
                 input_data=input_data,
                 output_data=analysis_result,
                 execution_time_ms=execution_time_ms,
-                workflow_id=workflow_id
+                workflow_id=workflow_id,
+                message=message
             )
             
-            # Notify risk assessment agent if significant patterns found
-            if analysis_result.get('patterns_count', 0) > 0 or analysis_result.get('anomalies_count', 0) > 0:
-                await self.send_message(
-                    recipient="RiskAssessmentAgent",
-                    message_type=MessageType.WEATHER_UPDATE,
-                    payload={
-                        "location": location,
-                        "analysis_result": analysis_result,
-                        "requires_risk_assessment": True,
-                        "priority": "high" if analysis_result.get('anomalies_count', 0) > 0 else "normal"
-                    },
-                    priority=2 if analysis_result.get('anomalies_count', 0) > 0 else 3,
-                    workflow_id=workflow_id
-                )
-            
             return analysis_result
             
         except Exception as e:
@@ -329,6 +697,74 @@ class EnhancedWeatherAnalysisAgent(EnhancedBaseAgent):
             
             return {"status": "error", "error": str(e)}
     
+    async def analyze_batch_with_collaboration(self, locations: List[str], workflow_id: str = None):
+        """Analyze locations in batched core agent calls, acting on each batch as it finishes.
+        
+        Locations are split into one batch per pool worker; as each batch
+        completes its executions are logged with one insert and its risk
+        notifications go out, so downstream agents start before the
+        slowest batch is done. Results are returned in input order.
+        """
+        loop = asyncio.get_running_loop()
+        batch_size = -(-len(locations) // CORE_AGENT_POOL_SIZE) or 1
+        
+        async def run_batch(start: int):
+            batch = locations[start:start + batch_size]
+            batch_start = time.perf_counter_ns()
+            try:
+                results = await loop.run_in_executor(
+                    _core_agent_pool, self.core_agent.execute_batch, batch
+                )
+            except Exception as e:
+                logger.error(f"Batch analysis failed for {batch}: {e}")
+                results = [{"status": "error", "error": str(e)} for _ in batch]
+            # Per-location timing is not tracked inside a batch; record the average
+            elapsed_ms = (time.perf_counter_ns() - batch_start) // 1_000_000 // len(batch)
+            return start, batch, results, elapsed_ms
+        
+        results: List[Dict] = [None] * len(locations)
+        for finished in asyncio.as_completed(
+            [run_batch(start) for start in range(0, len(locations), batch_size)]
+        ):
+            start, batch, batch_results, elapsed_ms = await finished
+            results[start:start + len(batch)] = batch_results
+            
+            await self.log_executions(
+                execution_type="collaborative_analysis",
+                executions=[
+                    ({"location": location, "analysis_type": "comprehensive"}, result)
+                    for location, result in zip(batch, batch_results)
+                ],
+                execution_time_ms=elapsed_ms,
+                workflow_id=workflow_id
+            )
+            
+            # Notify risk assessment agent about every location with findings
+            for location, result in zip(batch, batch_results):
+                message = self._risk_notification(location, result, workflow_id)
+                if message:
+                    await self.event_bus.publish(message)
+                    logger.info(f"{self.agent_name} sent {message.message_type.value} to {message.recipient_agent}")
+        
+        return results
+    
+    def _risk_notification(self, location: str, analysis_result: Dict, workflow_id: str = None) -> Optional[AgentMessage]:
+        """Build the risk assessment request for an analysis with findings, if any."""
+        if analysis_result.get('patterns_count', 0) > 0 or analysis_result.get('anomalies_count', 0) > 0:
+            return self.create_message(
+                recipient="RiskAssessmentAgent",
+                message_type=MessageType.WEATHER_UPDATE,
+                payload={
+                    "location": location,
+                    "analysis_result": analysis_result,
+                    "requires_risk_assessment": True,
+                    "priority": "high" if analysis_result.get('anomalies_count', 0) > 0 else "normal"
+                },
+                priority=2 if analysis_result.get('anomalies_count', 0) > 0 else 3,
+                workflow_id=workflow_id
+            )
+        return None
+    
     async def handle_weather_update(self, message: AgentMessage):
         """Handle weather update messages."""
         payload = message.payload
@@ -358,13 +794,12 @@ class EnhancedRiskAssessmentAgent(EnhancedBaseAgent):
     
     def setup_subscriptions(self):
         """Subscribe to relevant message types."""
-        self.event_bus.subscribe(MessageType.WEATHER_UPDATE, self.handle_message)
-        self.event_bus.subscribe(MessageType.RISK_ASSESSMENT, self.handle_message)
+        self.event_bus.subscribe(MessageType.WEATHER_UPDATE, self.handle_message, recipient=self.agent_name)
+        self.event_bus.subscribe(MessageType.RISK_ASSESSMENT, self.handle_message, recipient=self.agent_name)
     
     async def assess_risk_with_collaboration(self, location: str, weather_context: Dict = None, workflow_id: str = None):
         """Assess risk and coordinate with action planning."""
-        import time
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
         try:
             # Perform risk assessment using your existing agent
@@ -372,22 +807,14 @@ class EnhancedRiskAssessmentAgent(EnhancedBaseAgent):
             if weather_context:
                 input_data["weather_context"] = weather_context
             
-            risk_result = self.core_agent.execute(input_data)
-            execution_time_ms = int((time.time() - start_time) * 1000)
-            
-            # Log execution
-            await self.log_execution(
-                execution_type="collaborative_risk_assessment",
-                input_data=input_data,
-                output_data=risk_result,
-                execution_time_ms=execution_time_ms,
-                workflow_id=workflow_id
-            )
+            risk_result = await self.execute_core(input_data)
+            execution_time_ms = (time.perf_counter_ns() - start_time) // 1_000_000
             
             # If high risk, immediately notify action planning agent
+            message = None
             risk_level = risk_result.get('risk_level', 'LOW')
             if risk_level in ['HIGH', 'CRITICAL']:
-                await self.send_message(
+                message = self.create_message(
                     recipient="ActionPlanningAgent",
                     message_type=MessageType.ACTION_REQUIRED,
                     payload={
@@ -400,6 +827,16 @@ class EnhancedRiskAssessmentAgent(EnhancedBaseAgent):
                     workflow_id=workflow_id
                 )
             
+            # Log execution together with any notification
+            await self.log_and_emit(
+                execution_type="collaborative_risk_assessment",
+                input_data=input_data,
+                output_data=risk_result,
+                execution_time_ms=execution_time_ms,
+                workflow_id=workflow_id,
+                message=message
+            )
+            
             return risk_result
             
         except Exception as e:
@@ -438,12 +875,11 @@ class EnhancedActionPlanningAgent(EnhancedBaseAgent):
     
     def setup_subscriptions(self):
         """Subscribe to relevant message types."""
-        self.event_bus.subscribe(MessageType.ACTION_REQUIRED, self.handle_message)
+        self.event_bus.subscribe(MessageType.ACTION_REQUIRED, self.handle_message, recipient=self.agent_name)
     
     async def plan_actions_with_collaboration(self, location: str, risk_data: Dict, workflow_id: str = None):
         """Generate action plan and coordinate with report generation."""
-        import time
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
         try:
             # Generate action plan using your existing agent
@@ -453,21 +889,13 @@ class EnhancedActionPlanningAgent(EnhancedBaseAgent):
                 "category_risks": risk_data.get('category_risks', {})
             }
             
-            action_result = self.core_agent.execute(input_data)
-            execution_time_ms = int((time.time() - start_time) * 1000)
-            
-            # Log execution
-            await self.log_execution(
-                execution_type="collaborative_action_planning",
-                input_data=input_data,
-                output_data=action_result,
-                execution_time_ms=execution_time_ms,
-                workflow_id=workflow_id
-            )
+            action_result = await self.execute_core(input_data)
+            execution_time_ms = (time.perf_counter_ns() - start_time) // 1_000_000
             
             # Notify report generation agent for high-priority plans
+            message = None
             if action_result.get('plan_priority', 5) <= 2:
-                await self.send_message(
+                message = self.create_message(
                     recipient="ReportGenerationAgent",
                     message_type=MessageType.REPORT_GENERATED,
                     payload={
@@ -480,6 +908,16 @@ class EnhancedActionPlanningAgent(EnhancedBaseAgent):
                     workflow_id=workflow_id
                 )
             
+            # Log execution together with any notification
+            await self.log_and_emit(
+                execution_type="collaborative_action_planning",
+                input_data=input_data,
+                output_data=action_result,
+                execution_time_ms=execution_time_ms,
+                workflow_id=workflow_id,
+                message=message
+            )
+            
             return action_result
             
         except Exception as e:
@@ -527,9 +965,33 @@ class WorkflowOrchestrator:
             logger.error(f"Failed to import agent: {e}")
             logger.info("Make sure your existing agent files are in the same directory")
     
+    async def drain_agents(self):
+        """Wait until no agent has queued messages left.
+        
+        Handling a message can queue new ones for other agents, so keep
+        waiting until every inbox is idle at the same time.
+        """
+        while True:
+            busy = [agent.drain_inbox() for agent in self.agents.values() if agent.has_pending_messages]
+            if not busy:
+                return
+            await asyncio.gather(*busy)
+    
+    async def close(self):
+        """Drain agent inboxes and buffered message writes before shutdown."""
+        await self.drain_agents()
+        await self.event_bus.close()
+    
     async def execute_emergency_workflow(self, location: str, trigger_event: str):
         """Execute emergency response workflow."""
         
+        # One commit for the whole workflow step instead of one per write
+        async with self.event_bus.transaction():
+            return await self._run_emergency_workflow(location, trigger_event)
+    
+    async def _run_emergency_workflow(self, location: str, trigger_event: str):
+        """Emergency workflow body, run inside an event bus transaction."""
+        
         workflow_id = self.event_bus.start_workflow(
             workflow_type="emergency",
             initiator="WorkflowOrchestrator",
@@ -553,6 +1015,10 @@ class WorkflowOrchestrator:
                 
                 # The workflow continues through agent messaging...
                 # Other agents will be automatically triggered based on the results
+                await self.drain_agents()
+            
+            # Every triggered agent has finished (returns at once if none were)
+            await self.event_bus.complete_workflow(workflow_id, "completed")
             
             return {
                 "status": "success",
@@ -563,12 +1029,19 @@ class WorkflowOrchestrator:
             
         except Exception as e:
             logger.error(f"Emergency workflow failed: {e}")
-            self.event_bus.complete_workflow(workflow_id, "failed")
+            await self.event_bus.complete_workflow(workflow_id, "failed")
             return {"status": "error", "message": str(e)}
     
     async def execute_routine_monitoring_workflow(self, locations: List[str]):
         """Execute routine monitoring across multiple locations."""
         
+        # One commit for the whole workflow step instead of one per write
+        async with self.event_bus.transaction():
+            return await self._run_routine_monitoring_workflow(locations)
+    
+    async def _run_routine_monitoring_workflow(self, locations: List[str]):
+        """Routine monitoring workflow body, run inside an event bus transaction."""
+        
         workflow_id = self.event_bus.start_workflow(
             workflow_type="routine_monitoring",
             initiator="WorkflowOrchestrator",
@@ -582,32 +1055,28 @@ class WorkflowOrchestrator:
             return {"status": "error", "message": "Failed to start workflow"}
         
         try:
-            # Process multiple locations in parallel
-            tasks = []
-            for location in locations:
-                if "WeatherAnalysisAgent" in self.agents:
-                    task = self.agents["WeatherAnalysisAgent"].analyze_with_collaboration(
-                        location, workflow_id
-                    )
-                    tasks.append(task)
-            
-            # Wait for all analyses to complete
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # Analyze all locations in one batched core agent call
+            results = []
+            if "WeatherAnalysisAgent" in self.agents:
+                results = await self.agents["WeatherAnalysisAgent"].analyze_batch_with_collaboration(
+                    locations, workflow_id
+                )
+            await self.drain_agents()
             
             # Complete workflow
-            self.event_bus.complete_workflow(workflow_id, "completed")
+            await self.event_bus.complete_workflow(workflow_id, "completed")
             
             return {
                 "status": "success",
                 "workflow_id": workflow_id,
                 "locations_processed": len(locations),
-                "results": len([r for r in results if not isinstance(r, Exception)]),
-                "errors": len([r for r in results if isinstance(r, Exception)])
+                "results": len([r for r in results if r.get("status") != "error"]),
+                "errors": len([r for r in results if r.get("status") == "error"])
             }
             
         except Exception as e:
             logger.error(f"Routine monitoring workflow failed: {e}")
-            self.event_bus.complete_workflow(workflow_id, "failed")
+            await self.event_bus.complete_workflow(workflow_id, "failed")
             return {"status": "error", "message": str(e)}
 
 # Test function
@@ -634,6 +1103,9 @@ async def test_enhanced_system(db_session: Session):
     )
     print(f"   Result: {result['status']} - Processed {result.get('results', 0)} locations")
     
+    # Persist any buffered messages before callers inspect the database
+    await orchestrator.close()
+    
     print("\n✅ Enhanced system test completed!")
     return orchestrator
 
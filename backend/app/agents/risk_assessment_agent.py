@@ -3,28 +3,46 @@ Risk Assessment Agent
 Evaluates disaster risks based on weather analysis and generates risk scores
 """
 
-import sys
-from pathlib import Path
-from typing import Dict, Any
-
-# Add backend to path for imports
-backend_dir = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(backend_dir))
+from typing import Dict, Any, Optional
+from sqlalchemy.orm import Session
 
 from app.agents.base_agent import BaseAgent
 from app.services.weather_analysis import WeatherAnalysisService
-from app.core.database import SessionLocal
+from app.core.database import session_scope
+
+# Response priority by number of thresholds the risk score reaches
+_PRIORITIES = ("LOW", "MEDIUM", "HIGH", "IMMEDIATE")
 
 class RiskAssessmentAgent(BaseAgent):
     """Agent specialized in disaster risk assessment."""
     
+    # (category, risk threshold, actions) applied in order; add a row per category
+    _ACTION_RULES = (
+        # High typhoon risk actions
+        ("typhoon", 0.6, (
+            "Activate emergency operations center",
+            "Issue typhoon warning to communities",
+            "Prepare evacuation centers"
+        )),
+        # High flood risk actions
+        ("flooding", 0.6, (
+            "Deploy flood monitoring teams",
+            "Check drainage systems",
+            "Alert flood-prone communities"
+        )),
+        # Heat stress actions
+        ("heat_stress", 0.6, (
+            "Issue heat advisory warnings",
+            "Open cooling centers",
+            "Monitor vulnerable populations"
+        )),
+    )
+    
     def __init__(self):
         """Initialize risk assessment agent."""
         super().__init__("RiskAssessmentAgent")
-        self.db = SessionLocal()
-        self.analysis_service = WeatherAnalysisService(self.db)
     
-    def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def process(self, input_data: Dict[str, Any], db: Optional[Session] = None) -> Dict[str, Any]:
         """Process weather data and assess disaster risks."""
         
         location = input_data.get("location")
@@ -34,7 +52,8 @@ class RiskAssessmentAgent(BaseAgent):
             raise ValueError("Location is required for risk assessment")
         
         # Get comprehensive risk assessment
-        risk_score = self.analysis_service.calculate_risk_scores(location, forecast_hours)
+        with session_scope(db) as session:
+            risk_score = WeatherAnalysisService(session).calculate_risk_scores(location, forecast_hours)
         
         # Determine priority level
         priority = self._determine_priority(risk_score.overall_risk)
@@ -57,55 +76,27 @@ class RiskAssessmentAgent(BaseAgent):
     
     def _determine_priority(self, risk_score: float) -> str:
         """Determine response priority based on risk score."""
-        if risk_score >= 0.8:
-            return "IMMEDIATE"
-        elif risk_score >= 0.6:
-            return "HIGH"
-        elif risk_score >= 0.4:
-            return "MEDIUM"
-        else:
-            return "LOW"
+        # Thresholds 0.4 / 0.6 / 0.8 each add one level
+        return _PRIORITIES[(risk_score >= 0.4) + (risk_score >= 0.6) + (risk_score >= 0.8)]
     
     def _generate_action_items(self, risk_score) -> list:
         """Generate specific action items based on risk assessment."""
-        action_items = []
-        
-        # High typhoon risk actions
-        if risk_score.category_risks.get('typhoon', 0) > 0.6:
-            action_items.extend([
-                "Activate emergency operations center",
-                "Issue typhoon warning to communities",
-                "Prepare evacuation centers"
-            ])
-        
-        # High flood risk actions
-        if risk_score.category_risks.get('flooding', 0) > 0.6:
-            action_items.extend([
-                "Deploy flood monitoring teams",
-                "Check drainage systems",
-                "Alert flood-prone communities"
-            ])
-        
-        # Heat stress actions
-        if risk_score.category_risks.get('heat_stress', 0) > 0.6:
-            action_items.extend([
-                "Issue heat advisory warnings",
-                "Open cooling centers",
-                "Monitor vulnerable populations"
-            ])
+        category_risks = risk_score.category_risks
+        action_items = [
+            action
+            for category, threshold, actions in self._ACTION_RULES
+            if category_risks.get(category, 0) > threshold
+            for action in actions
+        ]
         
         # Default monitoring actions
         if not action_items:
             action_items.append("Continue routine weather monitoring")
         
         return action_items
-    
-    def __del__(self):
-        """Cleanup database connection."""
-        if hasattr(self, 'db'):
-            self.db.close()
 
 if __name__ == "__main__":
+    # Run from backend/ with: python -m app.agents.risk_assessment_agent
     # Test the risk assessment agent
     agent = RiskAssessmentAgent()
     
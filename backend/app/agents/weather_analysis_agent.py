@@ -3,17 +3,51 @@ Weather Analysis Agent
 Specialized agent for processing weather data and generating analysis
 """
 
-import sys
-from pathlib import Path
-from typing import Dict, Any
-
-# Add backend to path for imports
-backend_dir = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(backend_dir))
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from typing import Dict, Any, List, Optional
+from sqlalchemy.orm import Session
 
 from app.agents.base_agent import BaseAgent
 from app.services.weather_analysis import WeatherAnalysisService
-from app.core.database import SessionLocal
+from app.core.database import session_scope
+
+# Analysis kind -> (service method, days of history)
+_ANALYSIS_CALLS = {
+    "patterns": ("analyze_weather_patterns", 3),
+    "anomalies": ("detect_anomalies", 2),
+    "trends": ("analyze_trends", 7),
+}
+
+# Output key -> service result attribute, read in one C-level attrgetter call per row
+_PATTERN_FIELDS = {
+    "type": "pattern_type",
+    "confidence": "confidence",
+    "risk_level": "risk_level",
+    "description": "description",
+}
+_ANOMALY_FIELDS = {
+    "type": "anomaly_type",
+    "severity": "severity",
+    "value": "value",
+    "confidence": "confidence",
+}
+_PATTERN_KEYS = tuple(_PATTERN_FIELDS)
+_get_pattern_fields = attrgetter(*_PATTERN_FIELDS.values())
+_ANOMALY_KEYS = tuple(_ANOMALY_FIELDS)
+_get_anomaly_fields = attrgetter(*_ANOMALY_FIELDS.values())
+
+def _run_analysis(service: WeatherAnalysisService, kind: str, location: str):
+    """Run one kind of analysis with the given service."""
+    method_name, days = _ANALYSIS_CALLS[kind]
+    return getattr(service, method_name)(location, days=days)
+
+
+def _run_analysis_in_own_session(kind: str, location: str):
+    """Run one kind of analysis on a short-lived session of its own."""
+    with session_scope() as session:
+        return _run_analysis(WeatherAnalysisService(session), kind, location)
+
 
 class WeatherAnalysisAgent(BaseAgent):
     """Agent specialized in weather data analysis."""
@@ -21,10 +55,8 @@ class WeatherAnalysisAgent(BaseAgent):
     def __init__(self):
         """Initialize weather analysis agent."""
         super().__init__("WeatherAnalysisAgent")
-        self.db = SessionLocal()
-        self.analysis_service = WeatherAnalysisService(self.db)
     
-    def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def process(self, input_data: Dict[str, Any], db: Optional[Session] = None) -> Dict[str, Any]:
         """Process weather data and generate analysis."""
         
         location = input_data.get("location")
@@ -33,33 +65,44 @@ class WeatherAnalysisAgent(BaseAgent):
         if not location:
             raise ValueError("Location is required for weather analysis")
         
+        kinds = [kind for kind in _ANALYSIS_CALLS if analysis_type in ("comprehensive", kind)]
+        
+        if db is not None or len(kinds) < 2:
+            # Caller's session (or a single query): run in this thread
+            with session_scope(db) as session:
+                service = WeatherAnalysisService(session)
+                raw = {kind: _run_analysis(service, kind, location) for kind in kinds}
+        else:
+            # Independent DB-bound queries, each on its own session (sessions are
+            # not thread-safe). Threads are per call, so the coordinator's
+            # concurrent pipelines never queue behind a shared fixed-size pool
+            with ThreadPoolExecutor(
+                max_workers=len(kinds), thread_name_prefix="weather-analysis"
+            ) as analysis_pool:
+                futures = {
+                    kind: analysis_pool.submit(_run_analysis_in_own_session, kind, location)
+                    for kind in kinds
+                }
+                raw = {kind: future.result() for kind, future in futures.items()}
+        
+        return self._build_result(location, analysis_type, raw)
+    
+    def _build_result(self, location: str, analysis_type: str, raw: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape raw service results into the agent's output."""
         results = {}
         
-        if analysis_type in ["comprehensive", "patterns"]:
-            patterns = self.analysis_service.analyze_weather_patterns(location, days=3)
+        if "patterns" in raw:
             results["weather_patterns"] = [
-                {
-                    "type": p.pattern_type,
-                    "confidence": p.confidence,
-                    "risk_level": p.risk_level,
-                    "description": p.description
-                } for p in patterns
+                dict(zip(_PATTERN_KEYS, _get_pattern_fields(p))) for p in raw["patterns"]
             ]
         
-        if analysis_type in ["comprehensive", "anomalies"]:
-            anomalies = self.analysis_service.detect_anomalies(location, days=2)
+        if "anomalies" in raw:
             results["anomalies"] = [
-                {
-                    "type": a.anomaly_type,
-                    "severity": a.severity,
-                    "value": a.value,
-                    "confidence": a.confidence
-                } for a in anomalies
+                dict(zip(_ANOMALY_KEYS, _get_anomaly_fields(a))) for a in raw["anomalies"]
             ]
         
-        if analysis_type in ["comprehensive", "trends"]:
-            trends = self.analysis_service.analyze_trends(location, days=7)
-            results["trends"] = trends
+        if "trends" in raw:
+            results["trends"] = raw["trends"]
         
         return {
             "location": location,
@@ -69,12 +112,24 @@ class WeatherAnalysisAgent(BaseAgent):
             "analysis_type": analysis_type
         }
     
-    def __del__(self):
-        """Cleanup database connection."""
-        if hasattr(self, 'db'):
-            self.db.close()
+    def execute_batch(self, locations: List[str], analysis_type: str = "comprehensive") -> List[Dict[str, Any]]:
+        """Execute the analysis for several locations in one call.
+        
+        Every location reuses one session and connection instead of each run
+        checking out its own.
+        """
+        results = []
+        with session_scope() as session:
+            for location in locations:
+                result = self.execute({"location": location, "analysis_type": analysis_type}, session)
+                if result["status"] == "error":
+                    # A failed query aborts the transaction; reset before the next location
+                    session.rollback()
+                results.append(result)
+        return results
 
 if __name__ == "__main__":
+    # Run from backend/ with: python -m app.agents.weather_analysis_agent
     # Test the weather analysis agent
     agent = WeatherAnalysisAgent()
     
@@ -3,16 +3,13 @@ Agent API Endpoints
 Provides access to the complete agent system
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
 from typing import Optional
-from pydantic import BaseModel
-import sys
-from pathlib import Path
-
-# Add backend to path
-backend_dir = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(backend_dir))
+from functools import lru_cache
+import asyncio
+import orjson
+from pydantic import BaseModel, field_validator
 
 from ..core.database import get_db
 from ..agents.agent_coordinator import AgentCoordinator
@@ -21,57 +18,95 @@ from ..mcp.mcp_server import MCPWeatherServer
 
 router = APIRouter()
 
+# Agents and the MCP server are expensive to build (RAG/vector services, DB
+# sessions), so one instance per process is created on first use and reused
+@lru_cache(maxsize=1)
+def get_coordinator() -> AgentCoordinator:
+    """Shared agent coordinator."""
+    return AgentCoordinator()
+
+@lru_cache(maxsize=1)
+def get_report_agent() -> ReportGenerationAgent:
+    """Shared report generation agent."""
+    return ReportGenerationAgent()
+
+@lru_cache(maxsize=1)
+def get_mcp_server() -> MCPWeatherServer:
+    """Shared MCP server."""
+    return MCPWeatherServer()
+
+# MCP tool -> parameters it accepts, in the order they are reported back
+_TOOL_PARAMS = {
+    "get_current_weather": ("location",),
+    "calculate_risk_score": ("location", "forecast_hours"),
+    "analyze_weather_patterns": ("location", "days"),
+    "search_drrm_knowledge": ("query", "n_results"),
+}
+
 class AgentAnalysisRequest(BaseModel):
     """Request for agent analysis."""
     location: str
     include_report: bool = True
+    
+    @field_validator("location")
+    @classmethod
+    def _location_not_blank(cls, value: str) -> str:
+        """Reject blank locations with a 422 before any agent work starts."""
+        if not value.strip():
+            raise ValueError("Location is required for agent analysis")
+        return value
 
 @router.post("/analyze/comprehensive")
 async def comprehensive_agent_analysis(
     request: AgentAnalysisRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    coordinator: AgentCoordinator = Depends(get_coordinator),
+    report_agent: ReportGenerationAgent = Depends(get_report_agent)
 ):
     """Run comprehensive analysis using all agents."""
     
     try:
-        coordinator = AgentCoordinator()
-        
-        # Run full agent analysis
-        analysis_result = coordinator.run_full_analysis(request.location)
+        # Agents do blocking DB and CPU work; run it off the event loop so
+        # concurrent requests overlap instead of queueing behind each other
+        analysis_result = await asyncio.to_thread(coordinator.run_full_analysis, request.location)
+        analysis_data = analysis_result.to_dict()
+        detailed = analysis_data["detailed_results"]
         
         # Generate report if requested
-        report_data = None
+        report_json = None
         if request.include_report:
-            report_agent = ReportGenerationAgent()
-            
             report_input = {
                 "location": request.location,
-                "weather_analysis": analysis_result["detailed_results"]["weather_analysis"],
-                "risk_assessment": analysis_result["detailed_results"]["risk_assessment"],
-                "action_plan": analysis_result["detailed_results"]["action_plan"]
+                "weather_analysis": detailed["weather_analysis"],
+                "risk_assessment": detailed["risk_assessment"],
+                "action_plan": detailed["action_plan"]
             }
             
-            report_result = report_agent.execute(report_input)
-            report_data = report_result.get("report")
+            report_result = await asyncio.to_thread(report_agent.execute, report_input)
+            report_json = report_result.get("report_json")
         
-        return {
+        # Encode the (large) response once with orjson instead of FastAPI's
+        # jsonable_encoder walk followed by json.dumps; the report agent
+        # already encoded the report, so its bytes are spliced in as-is
+        payload = orjson.dumps({
             "status": "success",
             "location": request.location,
-            "analysis_summary": analysis_result["analysis_summary"],
-            "detailed_results": analysis_result["detailed_results"],
-            "execution_summary": analysis_result["execution_summary"],
-            "report": report_data
-        }
+            "analysis_summary": analysis_data["analysis_summary"],
+            "detailed_results": detailed,
+            "execution_summary": analysis_data["execution_summary"],
+            "report": orjson.Fragment(report_json) if report_json is not None else None
+        }, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY, default=str)
+        
+        return Response(content=payload, media_type="application/json")
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent analysis failed: {str(e)}")
 
 @router.get("/mcp/tools")
-async def list_mcp_tools():
+async def list_mcp_tools(server: MCPWeatherServer = Depends(get_mcp_server)):
     """List available MCP tools."""
     
     try:
-        server = MCPWeatherServer()
         tools = server.list_tools()
         
         return {
@@ -90,27 +125,23 @@ async def execute_mcp_tool(
     query: Optional[str] = None,
     forecast_hours: Optional[int] = 24,
     days: Optional[int] = 3,
-    n_results: Optional[int] = 3
+    n_results: Optional[int] = 3,
+    server: MCPWeatherServer = Depends(get_mcp_server)
 ):
     """Execute an MCP tool with parameters."""
     
     try:
-        server = MCPWeatherServer()
-        
-        # Build parameters based on tool
-        params = {}
-        if location:
-            params["location"] = location
-        if query:
-            params["query"] = query
-        if forecast_hours and tool_name == "calculate_risk_score":
-            params["forecast_hours"] = forecast_hours
-        if days and tool_name == "analyze_weather_patterns":
-            params["days"] = days
-        if n_results and tool_name == "search_drrm_knowledge":
-            params["n_results"] = n_results
+        # Pass only the parameters the tool accepts
+        supplied = {
+            "location": location,
+            "query": query,
+            "forecast_hours": forecast_hours,
+            "days": days,
+            "n_results": n_results
+        }
+        params = {name: supplied[name] for name in _TOOL_PARAMS.get(tool_name, ("location",)) if supplied[name]}
         
-        result = server.execute_tool(tool_name, **params)
+        result = await asyncio.to_thread(server.execute_tool, tool_name, **params)
         
         return {
             "status": "success",
@@ -2,19 +2,27 @@
 WebSocket API Endpoints for Real-time Events
 """
 
-import json
 import logging
+import os
+from types import MappingProxyType
 from typing import Dict, Any, List
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy import text
 from pydantic import BaseModel
 
+from ..core.database import get_db
+from ..services.realtime_events import send_payload, decode_payload
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Development-only endpoints are enabled with DEBUG=true
+DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
+
 class WeatherUpdateRequest(BaseModel):
     """Request model for weather updates."""
     location: str
@@ -53,6 +61,60 @@ class ConnectionManager:
 # Global connection manager
 manager = ConnectionManager()
 
+# Weather readings used by /realtime/simulate-event, by event type and severity
+_FLOOD_CONDITIONS = MappingProxyType({
+    "temperature": 30.0,
+    "humidity": 95,
+    "wind_speed": 25,
+    "pressure": 990,
+    "weather_condition": "Heavy Rain",
+    "wind_direction": 270,
+    "visibility": 3.0
+})
+_SIMULATED_CONDITIONS = MappingProxyType({
+    "typhoon": MappingProxyType({
+        "critical": MappingProxyType({
+            "temperature": 28.0,
+            "humidity": 85,
+            "wind_speed": 95,
+            "pressure": 980,
+            "weather_condition": "Severe Storm",
+            "wind_direction": 180,
+            "visibility": 5.0
+        }),
+        "warning": MappingProxyType({
+            "temperature": 28.0,
+            "humidity": 85,
+            "wind_speed": 65,
+            "pressure": 995,
+            "weather_condition": "Severe Storm",
+            "wind_direction": 180,
+            "visibility": 5.0
+        })
+    }),
+    "heat": MappingProxyType({
+        "critical": MappingProxyType({
+            "temperature": 42.0,
+            "humidity": 65,
+            "wind_speed": 10,
+            "pressure": 1010,
+            "weather_condition": "Hot",
+            "wind_direction": 90,
+            "visibility": 8.0
+        }),
+        "warning": MappingProxyType({
+            "temperature": 37.0,
+            "humidity": 65,
+            "wind_speed": 10,
+            "pressure": 1010,
+            "weather_condition": "Hot",
+            "wind_direction": 90,
+            "visibility": 8.0
+        })
+    }),
+    "flood": MappingProxyType({"critical": _FLOOD_CONDITIONS, "warning": _FLOOD_CONDITIONS})
+})
+
 @router.websocket("/ws/realtime")
 async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)):
     """WebSocket endpoint for real-time weather alerts."""
@@ -66,21 +128,25 @@ async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)
         welcome_message = {
             "type": "connection_established",
             "message": "Connected to WeatherWise real-time alerts",
-            "active_events_count": len(processor.get_active_events())
+            "active_events_count": processor.active_events_count
         }
-        await websocket.send_text(json.dumps(welcome_message))
+        await send_payload(websocket, welcome_message)
         
         while True:
             # Keep connection alive and handle incoming messages
             try:
-                data = await websocket.receive_text()
+                frame = await websocket.receive()
+                if frame["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(frame.get("code", 1000))
                 
                 # Handle client messages (like subscription preferences)
                 try:
-                    message = json.loads(data)
+                    message = decode_payload(frame)
+                except ValueError:
+                    logger.warning(f"Invalid message received: {frame.get('text', frame.get('bytes'))}")
+                    continue
+                if isinstance(message, dict):
                     await handle_client_message(websocket, message, processor)
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON received: {data}")
                     
             except WebSocketDisconnect:
                 break
@@ -101,6 +167,11 @@ async def handle_client_message(websocket: WebSocket, message: Dict, processor):
         # Handle subscription to specific locations or alert types
         locations = message.get('locations', [])
         alert_types = message.get('alert_types', [])
+        try:
+            processor.subscribe(websocket, alert_types)
+        except ValueError as e:
+            await send_payload(websocket, {"type": "error", "request": "subscribe", "message": str(e)})
+            return
         
         response = {
             "type": "subscription_confirmed",
@@ -110,7 +181,7 @@ async def handle_client_message(websocket: WebSocket, message: Dict, processor):
                 "status": "subscribed"
             }
         }
-        await websocket.send_text(json.dumps(response))
+        await send_payload(websocket, response)
         
     elif message_type == 'get_active_events':
         # Send current active events
@@ -120,12 +191,12 @@ async def handle_client_message(websocket: WebSocket, message: Dict, processor):
             "events": active_events,
             "count": len(active_events)
         }
-        await websocket.send_text(json.dumps(response))
+        await send_payload(websocket, response)
         
     elif message_type == 'ping':
         # Respond to ping with pong
         response = {"type": "pong", "timestamp": message.get('timestamp')}
-        await websocket.send_text(json.dumps(response))
+        await send_payload(websocket, response)
 
 @router.post("/realtime/process")
 async def process_weather_update(
@@ -138,7 +209,7 @@ async def process_weather_update(
         processor = manager.get_event_processor(db)
         
         # Convert Pydantic model to dict
-        weather_dict = weather_data.dict()
+        weather_dict = weather_data.model_dump()
         
         # Process weather data through real-time system
         events = await processor.process_weather_update(weather_dict)
@@ -185,42 +256,27 @@ async def get_active_events(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to retrieve events: {str(e)}")
 
 @router.get("/realtime/system-status")
-async def get_system_status(db: Session = Depends(get_db)):
+async def get_system_status(
+    exact: bool = Query(False, description="Count all events exactly instead of using the planner estimate"),
+    db: Session = Depends(get_db)
+):
     """Get real-time system status."""
     
     try:
         processor = manager.get_event_processor(db)
         
-        # Get database event counts
-        from sqlalchemy import text
-        
-        total_events = db.execute(text("""
-            SELECT COUNT(*) FROM realtime_events
-        """)).scalar()
-        
-        recent_events = db.execute(text("""
-            SELECT COUNT(*) FROM realtime_events 
-            WHERE created_at >= NOW() - INTERVAL '24 hours'
-        """)).scalar()
-        
-        active_workflows = db.execute(text("""
-            SELECT COUNT(*) FROM agent_workflows 
-            WHERE status IN ('pending', 'running')
-        """)).scalar()
+        # Event and workflow counts (briefly cached by the processor)
+        database_stats = processor.get_database_stats(db, exact)
         
         return {
             "status": "operational",
             "real_time_system": {
                 "active_connections": len(processor.active_connections),
-                "active_events": len(processor.get_active_events()),
+                "active_events": processor.active_events_count,
                 "event_history_size": len(processor.event_history),
                 "alert_thresholds_loaded": len(processor.alert_thresholds)
             },
-            "database_stats": {
-                "total_events": total_events,
-                "events_24h": recent_events,
-                "active_workflows": active_workflows
-            },
+            "database_stats": database_stats,
             "system_health": "healthy"
         }
         
@@ -242,49 +298,19 @@ async def simulate_weather_event(
     """Simulate a weather event for testing (development only)."""
     
     # Only allow in development
-    import os
-    if os.getenv('DEBUG', 'False').lower() != 'true':
+    if not DEBUG:
         raise HTTPException(status_code=403, detail="Simulation only available in debug mode")
     
     try:
         processor = manager.get_event_processor(db)
         
-        # Create test weather data based on event type
-        if event_type == "typhoon":
-            test_data = {
-                "location": location,
-                "temperature": 28.0,
-                "humidity": 85,
-                "wind_speed": 95 if severity == "critical" else 65,
-                "pressure": 980 if severity == "critical" else 995,
-                "weather_condition": "Severe Storm",
-                "wind_direction": 180,
-                "visibility": 5.0
-            }
-        elif event_type == "heat":
-            test_data = {
-                "location": location,
-                "temperature": 42.0 if severity == "critical" else 37.0,
-                "humidity": 65,
-                "wind_speed": 10,
-                "pressure": 1010,
-                "weather_condition": "Hot",
-                "wind_direction": 90,
-                "visibility": 8.0
-            }
-        elif event_type == "flood":
-            test_data = {
-                "location": location,
-                "temperature": 30.0,
-                "humidity": 95,
-                "wind_speed": 25,
-                "pressure": 990,
-                "weather_condition": "Heavy Rain",
-                "wind_direction": 270,
-                "visibility": 3.0
-            }
-        else:
+        # Create test weather data based on event type; any severity other
+        # than "critical" simulates warning-level conditions
+        try:
+            conditions = _SIMULATED_CONDITIONS[event_type]
+        except KeyError:
             raise HTTPException(status_code=400, detail="Invalid event type. Use: typhoon, heat, or flood")
+        test_data = {"location": location, **conditions["critical" if severity == "critical" else "warning"]}
         
         # Process the simulated data
         events = await processor.process_weather_update(test_data)
@@ -315,19 +341,16 @@ async def clear_all_events(db: Session = Depends(get_db)):
     """Clear all events (development only)."""
     
     # Only allow in development
-    import os
-    if os.getenv('DEBUG', 'False').lower() != 'true':
+    if not DEBUG:
         raise HTTPException(status_code=403, detail="Clear events only available in debug mode")
     
     try:
         processor = manager.get_event_processor(db)
         
         # Clear in-memory events
-        events_cleared = len(processor.event_history)
-        processor.event_history.clear()
+        events_cleared = processor.clear_event_history()
         
         # Clear database events (keep for audit, just mark as resolved)
-        from sqlalchemy import text
         db.execute(text("""
             UPDATE realtime_events 
             SET auto_resolved = true, resolved_at = NOW() 
@@ -344,13 +367,3 @@ async def clear_all_events(db: Session = Depends(get_db)):
     except Exception as e:
         logger.error(f"Failed to clear events: {e}")
         raise HTTPException(status_code=500, detail=f"Clear failed: {str(e)}")
-
-# Add the database dependency import at the top of the file
-def get_db():
-    """Database dependency - import from your main app."""
-    from ..core.database import SessionLocal
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -4,16 +4,26 @@ Handles weather data retrieval and analysis
 """
 
 from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
-from typing import List, Optional, Dict, Any
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, Query as OrmQuery
+from sqlalchemy import desc, and_, func, insert, text, tuple_
+from typing import Annotated, List, Optional, Dict, Any, Tuple, Type
+from dataclasses import asdict
 from datetime import datetime, timedelta
-from pydantic import BaseModel, Field
-from uuid import UUID
+from itertools import chain, islice
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel, BeforeValidator, Field, TypeAdapter, ValidationError
+from uuid import UUID, uuid4
+import base64
 import logging
+import orjson
+import threading
+import time
+from cachetools import TTLCache
 
-from ..core.database import get_db
-from ..models.weather import CurrentWeather, WeatherForecast
+from ..core.database import get_db, session_scope
+from ..models.weather import CurrentWeather, WeatherForecast, location_key_prefix
 from ..services.weather_service import OpenWeatherService
 from ..services.data_validator import WeatherDataValidator
 from ..services.monitoring import WeatherMonitoring
@@ -23,7 +33,8 @@ from ..services.geospatial_service import GeospatialService
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Create router
+# Create router; handlers are plain functions because the SQLAlchemy
+# session and API client block, so FastAPI runs them in its thread pool
 router = APIRouter()
 
 # Initialize services
@@ -31,6 +42,103 @@ weather_service = OpenWeatherService()
 validator = WeatherDataValidator()
 monitor = WeatherMonitoring()
 
+# Columns summarised by the statistics endpoint, in response order
+_STATISTICS_COLUMNS = {
+    "temperature": CurrentWeather.temperature,
+    "humidity": CurrentWeather.humidity,
+    "pressure": CurrentWeather.pressure,
+    "wind_speed": CurrentWeather.wind_speed
+}
+
+# Lists longer than this are streamed as a JSON array, a batch of rows per
+# chunk, instead of being materialized and serialized in one piece
+STREAM_THRESHOLD = 100
+STREAM_BATCH_SIZE = 200
+
+# Distinct stored locations, refreshed at most once a minute
+LOCATIONS_CACHE_TTL_SECONDS = 60
+_locations_cache = TTLCache(maxsize=1, ttl=LOCATIONS_CACHE_TTL_SECONDS)
+
+# Latest reading per location; weather changes slowly and fetches invalidate it
+LATEST_WEATHER_CACHE_TTL_SECONDS = 60
+_latest_weather_cache = TTLCache(maxsize=1024, ttl=LATEST_WEATHER_CACHE_TTL_SECONDS)
+
+# Handlers run on worker threads and TTLCache is not thread-safe
+_cache_lock = threading.Lock()
+
+# Distinct locations via a loose index scan: each step jumps to the next
+# location in idx_current_weather_location instead of reading every row
+_DISTINCT_LOCATIONS_SQL = text("""
+    WITH RECURSIVE locations AS (
+        (SELECT location FROM current_weather ORDER BY location LIMIT 1)
+        UNION ALL
+        SELECT (
+            SELECT location FROM current_weather
+            WHERE location > locations.location
+            ORDER BY location LIMIT 1
+        )
+        FROM locations
+        WHERE locations.location IS NOT NULL
+    )
+    SELECT location FROM locations WHERE location IS NOT NULL
+""")
+
+# Validated fields copied onto a stored CurrentWeather row (the database sets timestamp)
+_STORED_WEATHER_FIELDS = (
+    'location', 'latitude', 'longitude', 'temperature', 'humidity', 'wind_speed',
+    'wind_direction', 'pressure', 'weather_condition', 'weather_description', 'visibility',
+)
+
+async def request_time() -> datetime:
+    """The request's timestamp, read once and shared by everything that needs "now"."""
+    return datetime.now()
+
+def _analyze_in_own_session(method_name: str, location: str, **kwargs):
+    """Run one WeatherAnalysisService analysis on a short-lived session of its own."""
+    with session_scope() as session:
+        return getattr(WeatherAnalysisService(session), method_name)(location, **kwargs)
+
+def _encode_forecast_cursor(forecast_date: datetime, forecast_id: UUID) -> str:
+    """Opaque page cursor for a (forecast_date, id) key.
+    
+    The key is URL-safe base64 without padding, so clients can pass it back
+    as a query parameter unencoded (a raw "+00:00" offset would decode to a space).
+    """
+    key = f"{forecast_date.isoformat()}_{forecast_id}".encode()
+    return base64.urlsafe_b64encode(key).rstrip(b"=").decode("ascii")
+
+def _parse_forecast_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a forecast page cursor into its (forecast_date, id) key."""
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        forecast_date, forecast_id = key.rsplit("_", 1)
+        return datetime.fromisoformat(forecast_date), UUID(forecast_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+
+def _stream_rows(query: OrmQuery, response_model: Type[BaseModel], not_found: str) -> StreamingResponse:
+    """Stream a query's rows as a JSON array of response models.
+    
+    Rows are fetched STREAM_BATCH_SIZE at a time; raises 404 if there are none.
+    """
+    rows = iter(query.yield_per(STREAM_BATCH_SIZE))
+    first = next(rows, None)
+    if first is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    rows = chain([first], rows)
+    
+    def encode(row) -> bytes:
+        return orjson.dumps(response_model.model_validate(row).model_dump())
+    
+    def body():
+        separator = b"["
+        while batch := list(islice(rows, STREAM_BATCH_SIZE)):
+            yield separator + b",".join(map(encode, batch))
+            separator = b","
+        yield b"]"
+    
+    return StreamingResponse(body(), media_type="application/json")
+
 # Pydantic models for API responses
 class WeatherResponse(BaseModel):
     """Weather data response model."""
@@ -44,8 +152,8 @@ class WeatherResponse(BaseModel):
     wind_direction: int
     pressure: float
     weather_condition: str
-    weather_description: str
-    visibility: float
+    weather_description: Optional[str] = None
+    visibility: Optional[float] = None
     timestamp: datetime
     
     class Config:
@@ -54,20 +162,46 @@ class WeatherResponse(BaseModel):
 
 class ForecastResponse(BaseModel):
     """Forecast data response model."""
-    id: str
+    id: UUID
     location: str
     forecast_date: datetime
+    temperature_min: Optional[float] = None
+    temperature_max: Optional[float] = None
+    humidity: Optional[int] = None
+    wind_speed: Optional[float] = None
+    pressure: Optional[float] = None
+    weather_condition: Optional[str] = None
+    weather_description: Optional[str] = None
+    precipitation_probability: Optional[int] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ForecastIn(BaseModel):
+    """One forecast entry from the weather API, shaped for a WeatherForecast row."""
+    forecast_date: datetime = Field(..., alias="datetime")
+    temperature: float
     temperature_min: float
     temperature_max: float
     humidity: int
     wind_speed: float
+    wind_direction: int
     pressure: float
     weather_condition: str
-    weather_description: str
-    precipitation_probability: int
-    
-    class Config:
-        from_attributes = True
+    weather_description: Optional[str] = None
+    # Percentages arrive as floats (pop * 100); stored truncated
+    precipitation_probability: Annotated[int, BeforeValidator(int)]
+
+
+# Validates and dumps a whole forecast batch in single calls
+_FORECAST_BATCH_ADAPTER = TypeAdapter(List[ForecastIn])
+
+
+class ForecastPage(BaseModel):
+    """One page of forecast data; pass next_cursor as `after` for the next page."""
+    items: List[ForecastResponse]
+    next_cursor: Optional[str] = None
 
 
 class WeatherAnalysisRequest(BaseModel):
@@ -128,9 +262,9 @@ class RegionalRiskRequest(BaseModel):
 
 
 @router.get("/current", response_model=List[WeatherResponse])
-async def get_current_weather(
+def get_current_weather(
     location: Optional[str] = Query(None, description="Filter by location"),
-    limit: int = Query(10, ge=1, le=100, description="Number of records to return"),
+    limit: int = Query(10, ge=1, le=1000, description="Number of records to return"),
     db: Session = Depends(get_db)
 ):
     """Get current weather data from database."""
@@ -138,10 +272,13 @@ async def get_current_weather(
     query = db.query(CurrentWeather)
     
     if location:
-        query = query.filter(CurrentWeather.location.ilike(f"%{location}%"))
+        query = query.filter(CurrentWeather.location_key.like(location_key_prefix(location), escape='/'))
     
     # Get most recent records
-    weather_data = query.order_by(desc(CurrentWeather.timestamp)).limit(limit).all()
+    query = query.order_by(desc(CurrentWeather.timestamp)).limit(limit)
+    if limit > STREAM_THRESHOLD:
+        return _stream_rows(query, WeatherResponse, "No weather data found")
+    weather_data = query.all()
     
     if not weather_data:
         raise HTTPException(status_code=404, detail="No weather data found")
@@ -150,12 +287,17 @@ async def get_current_weather(
 
 
 @router.get("/current/{location}")
-async def get_current_weather_by_location(
+def get_current_weather_by_location(
     location: str,
     db: Session = Depends(get_db)
 ):
     """Get latest weather data for specific location."""
     
+    with _cache_lock:
+        weather_data = _latest_weather_cache.get(location)
+    if weather_data is not None:
+        return weather_data
+    
     weather_data = db.query(CurrentWeather).filter(
         CurrentWeather.location == location
     ).order_by(desc(CurrentWeather.timestamp)).first()
@@ -163,11 +305,13 @@ async def get_current_weather_by_location(
     if not weather_data:
         raise HTTPException(status_code=404, detail=f"No weather data found for {location}")
     
+    with _cache_lock:
+        _latest_weather_cache[location] = weather_data
     return weather_data
 
 
 @router.post("/current/fetch")
-async def fetch_current_weather(
+def fetch_current_weather(
     location: str = Query(..., description="Location to fetch weather for"),
     db: Session = Depends(get_db)
 ):
@@ -178,20 +322,8 @@ async def fetch_current_weather(
         weather_data = weather_service.get_current_weather(location)
         
         # Convert to dictionary for validation
-        weather_dict = {
-            'location': weather_data.location,
-            'latitude': weather_data.latitude,
-            'longitude': weather_data.longitude,
-            'temperature': weather_data.temperature,
-            'humidity': weather_data.humidity,
-            'wind_speed': weather_data.wind_speed,
-            'wind_direction': weather_data.wind_direction,
-            'pressure': weather_data.pressure,
-            'weather_condition': weather_data.weather_condition,
-            'weather_description': weather_data.weather_description,
-            'visibility': weather_data.visibility,
-            'timestamp': weather_data.timestamp
-        }
+        weather_dict = asdict(weather_data)
+        weather_dict.pop('source', None)
         
         # Validate data
         validation_result = validator.validate_current_weather(weather_dict)
@@ -205,23 +337,18 @@ async def fetch_current_weather(
         # Store in database
         cleaned_data = validation_result.cleaned_data
         db_weather = CurrentWeather(
-            location=cleaned_data['location'],
-            latitude=cleaned_data['latitude'],
-            longitude=cleaned_data['longitude'],
-            temperature=cleaned_data['temperature'],
-            humidity=cleaned_data['humidity'],
-            wind_speed=cleaned_data['wind_speed'],
-            wind_direction=cleaned_data['wind_direction'],
-            pressure=cleaned_data['pressure'],
-            weather_condition=cleaned_data['weather_condition'],
-            weather_description=cleaned_data['weather_description'],
-            visibility=cleaned_data['visibility'],
-            timestamp=datetime.now()
+            **{field: cleaned_data[field] for field in _STORED_WEATHER_FIELDS}
         )
         
         db.add(db_weather)
         db.commit()
-        db.refresh(db_weather)
+        
+        with _cache_lock:
+            # The cached latest reading is superseded, and a new location
+            # makes the cached location list stale
+            _latest_weather_cache.pop(db_weather.location, None)
+            if db_weather.location not in _locations_cache.get("locations", ()):
+                _locations_cache.clear()
         
         return {
             "message": f"Weather data fetched and stored for {location}",
@@ -234,16 +361,19 @@ async def fetch_current_weather(
         raise HTTPException(status_code=500, detail=f"Failed to fetch weather data: {str(e)}")
 
 
-@router.get("/forecast", response_model=List[ForecastResponse])
-async def get_weather_forecast(
+@router.get("/forecast", response_model=ForecastPage)
+def get_weather_forecast(
     location: Optional[str] = Query(None, description="Filter by location"),
     days: int = Query(3, ge=1, le=7, description="Number of days"),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum number of records per page"),
+    now: datetime = Depends(request_time),
     db: Session = Depends(get_db)
 ):
-    """Get weather forecast data from database."""
+    """Get weather forecast data from database, one page at a time."""
     
     # Calculate date range
-    start_date = datetime.now()
+    start_date = now
     end_date = start_date + timedelta(days=days)
     
     query = db.query(WeatherForecast).filter(
@@ -254,18 +384,32 @@ async def get_weather_forecast(
     )
     
     if location:
-        query = query.filter(WeatherForecast.location.ilike(f"%{location}%"))
+        query = query.filter(WeatherForecast.location_key.like(location_key_prefix(location), escape='/'))
     
-    forecast_data = query.order_by(WeatherForecast.forecast_date).all()
+    # Keyset pagination: resume after the last (forecast_date, id) already
+    # returned, so deep pages cost the same as the first
+    if after:
+        query = query.filter(
+            tuple_(WeatherForecast.forecast_date, WeatherForecast.id) > _parse_forecast_cursor(after)
+        )
+    
+    # One extra row tells whether another page follows
+    forecasts = query.order_by(WeatherForecast.forecast_date, WeatherForecast.id).limit(limit + 1).all()
     
-    if not forecast_data:
+    if not forecasts and not after:
         raise HTTPException(status_code=404, detail="No forecast data found")
     
-    return forecast_data
+    items = forecasts[:limit]
+    next_cursor = None
+    if len(forecasts) > limit:
+        last = items[-1]
+        next_cursor = _encode_forecast_cursor(last.forecast_date, last.id)
+    
+    return ForecastPage(items=items, next_cursor=next_cursor)
 
 
 @router.post("/forecast/fetch")
-async def fetch_weather_forecast(
+def fetch_weather_forecast(
     location: str = Query(..., description="Location to fetch forecast for"),
     days: int = Query(3, ge=1, le=5, description="Number of days to forecast"),
     db: Session = Depends(get_db)
@@ -276,30 +420,21 @@ async def fetch_weather_forecast(
         # Fetch forecast from weather API
         forecast_data = weather_service.get_weather_forecast(location, days)
         
-        # Store each forecast entry
-        stored_count = 0
-        for forecast in forecast_data:
-            db_forecast = WeatherForecast(
-                location=location,
-                latitude=0,  # We'll need coordinates from location lookup
-                longitude=0,
-                forecast_date=datetime.fromisoformat(forecast['datetime'].replace(' ', 'T')),
-                temperature=forecast['temperature'],
-                temperature_min=forecast['temperature_min'],
-                temperature_max=forecast['temperature_max'],
-                humidity=forecast['humidity'],
-                wind_speed=forecast['wind_speed'],
-                wind_direction=forecast['wind_direction'],
-                pressure=forecast['pressure'],
-                weather_condition=forecast['weather_condition'],
-                weather_description=forecast['weather_description'],
-                precipitation_probability=int(forecast['precipitation_probability'])
-            )
-            
-            db.add(db_forecast)
-            stored_count += 1
-        
+        # Validate the whole batch in one pass before any DB work, then store
+        # all entries with one executemany INSERT
+        try:
+            forecasts = _FORECAST_BATCH_ADAPTER.validate_python(forecast_data)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"Forecast validation failed: {e}")
+        rows = _FORECAST_BATCH_ADAPTER.dump_python(forecasts)
+        for row in rows:
+            row["location"] = location
+            row["latitude"] = 0  # We'll need coordinates from location lookup
+            row["longitude"] = 0
+        if rows:
+            db.execute(insert(WeatherForecast), rows)
         db.commit()
+        stored_count = len(rows)
         
         return {
             "message": f"Forecast data fetched and stored for {location}",
@@ -307,18 +442,24 @@ async def fetch_weather_forecast(
             "days": days
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to fetch forecast data: {str(e)}")
 
 
 @router.get("/locations")
-async def get_available_locations(db: Session = Depends(get_db)):
+def get_available_locations(db: Session = Depends(get_db)):
     """Get list of available weather data locations."""
     
     # Get unique locations from current weather data
-    locations = db.query(CurrentWeather.location).distinct().all()
-    location_list = [loc[0] for loc in locations]
+    with _cache_lock:
+        location_list = _locations_cache.get("locations")
+    if location_list is None:
+        location_list = db.execute(_DISTINCT_LOCATIONS_SQL).scalars().all()
+        with _cache_lock:
+            _locations_cache["locations"] = location_list
     
     if not location_list:
         return {"locations": [], "count": 0}
@@ -330,64 +471,56 @@ async def get_available_locations(db: Session = Depends(get_db)):
 
 
 @router.get("/statistics/{location}")
-async def get_weather_statistics(
+def get_weather_statistics(
     location: str,
     days: int = Query(7, ge=1, le=30, description="Number of days to analyze"),
+    now: datetime = Depends(request_time),
     db: Session = Depends(get_db)
 ):
     """Get weather statistics for a location."""
     
     # Calculate date range
-    start_date = datetime.now() - timedelta(days=days)
+    start_date = now - timedelta(days=days)
     
-    weather_data = db.query(CurrentWeather).filter(
+    # Aggregate in the database: one row back instead of every observation
+    aggregates = db.query(
+        func.count(CurrentWeather.id),
+        *(
+            aggregate(column)
+            for column in _STATISTICS_COLUMNS.values()
+            for aggregate in (func.min, func.max, func.avg)
+        )
+    ).filter(
         and_(
             CurrentWeather.location == location,
             CurrentWeather.timestamp >= start_date
         )
-    ).all()
+    ).one()
     
-    if not weather_data:
+    total_records = aggregates[0]
+    if not total_records:
         raise HTTPException(status_code=404, detail=f"No weather data found for {location}")
     
-    # Calculate statistics
-    temperatures = [w.temperature for w in weather_data]
-    humidities = [w.humidity for w in weather_data]
-    pressures = [w.pressure for w in weather_data]
-    wind_speeds = [w.wind_speed for w in weather_data]
-    
     statistics = {
         "location": location,
         "period_days": days,
-        "total_records": len(weather_data),
-        "temperature": {
-            "min": min(temperatures),
-            "max": max(temperatures),
-            "average": sum(temperatures) / len(temperatures)
-        },
-        "humidity": {
-            "min": min(humidities),
-            "max": max(humidities),
-            "average": sum(humidities) / len(humidities)
-        },
-        "pressure": {
-            "min": min(pressures),
-            "max": max(pressures),
-            "average": sum(pressures) / len(pressures)
-        },
-        "wind_speed": {
-            "min": min(wind_speeds),
-            "max": max(wind_speeds),
-            "average": sum(wind_speeds) / len(wind_speeds)
-        }
+        "total_records": total_records
     }
+    for index, name in enumerate(_STATISTICS_COLUMNS):
+        minimum, maximum, average = aggregates[1 + 3 * index:4 + 3 * index]
+        statistics[name] = {
+            "min": minimum,
+            "max": maximum,
+            "average": float(average)
+        }
     
     return statistics
 
 
 @router.post("/analyze", response_model=WeatherAnalysisResponse)
-async def analyze_weather_data(
+def analyze_weather_data(
     request: WeatherAnalysisRequest,
+    now: datetime = Depends(request_time),
     db: Session = Depends(get_db)
 ):
     """Analyze weather data and provide risk assessment."""
@@ -395,18 +528,19 @@ async def analyze_weather_data(
     # This is a placeholder for AI analysis integration
     # In a full implementation, this would use your AI agents
     
-    import uuid
-    
-    # Get recent weather data for the location
-    recent_data = db.query(CurrentWeather).filter(
+    # Only the latest reading's temperature, wind and humidity are assessed
+    latest = db.query(
+        CurrentWeather.temperature,
+        CurrentWeather.humidity,
+        CurrentWeather.wind_speed
+    ).filter(
         CurrentWeather.location == request.location
-    ).order_by(desc(CurrentWeather.timestamp)).limit(10).all()
+    ).order_by(desc(CurrentWeather.timestamp)).first()
     
-    if not recent_data:
+    if latest is None:
         raise HTTPException(status_code=404, detail=f"No weather data available for {request.location}")
     
     # Simple risk assessment based on current conditions
-    latest = recent_data[0]
     risk_level = "LOW"
     recommendations = []
     
@@ -427,19 +561,20 @@ async def analyze_weather_data(
         recommendations.append("Current weather conditions are within normal ranges")
     
     return WeatherAnalysisResponse(
-        analysis_id=str(uuid.uuid4()),
+        analysis_id=str(uuid4()),
         location=request.location,
         risk_level=risk_level,
         confidence_score=0.85,
         summary=f"Weather analysis for {request.location} shows {risk_level.lower()} risk conditions",
         recommendations=recommendations,
-        generated_at=datetime.now()
+        generated_at=now
     )
 
 @router.post("/analyze/comprehensive", response_model=ComprehensiveAnalysisResponse)
-async def comprehensive_weather_analysis(
+def comprehensive_weather_analysis(
     request: AdvancedAnalysisRequest,
     background_tasks: BackgroundTasks,
+    now: datetime = Depends(request_time),
     db: Session = Depends(get_db)
 ):
     """Perform comprehensive weather analysis including patterns, anomalies, risks, and trends."""
@@ -448,21 +583,48 @@ async def comprehensive_weather_analysis(
         logger.info(f"Starting comprehensive analysis for {request.location}")
         
         # Initialize analysis services
-        analysis_service = WeatherAnalysisService(db)
         geo_service = GeospatialService(db) if request.include_geospatial else None
         
         # Parse time range
         hours = parse_time_range(request.time_range)
         
+        # Start the requested analyses concurrently, each on its own session
+        analysis_calls = {
+            "risk_score": ("calculate_risk_scores", {"forecast_hours": hours if request.include_forecasts else 0}),
+            "patterns": ("analyze_weather_patterns", {"days": hours // 24 or 1}),
+            "anomalies": ("detect_anomalies", {"days": min(7, hours // 24 or 3)}),
+            "trends": ("analyze_trends", {"days": min(14, hours // 24 or 7)})
+        }
+        requested_calls = {
+            kind: call for kind, call in analysis_calls.items()
+            if kind in request.analysis_types
+        }
+        
+        # The analyses are independent DB-bound queries, each on its own session
+        # (sessions are not thread-safe). Threads are per request, so concurrent
+        # requests never queue behind one another's analyses
+        with ThreadPoolExecutor(
+            max_workers=max(1, len(requested_calls)), thread_name_prefix="weather-api-analysis"
+        ) as analysis_pool:
+            futures = {
+                kind: analysis_pool.submit(_analyze_in_own_session, method_name, request.location, **kwargs)
+                for kind, (method_name, kwargs) in requested_calls.items()
+            }
+            
+            # Geospatial context is gathered on the request's session meanwhile
+            geospatial_context = None
+            if request.include_geospatial and geo_service:
+                location_data = geo_service.process_location_data([request.location], hours)
+                geospatial_context = location_data.get(request.location, {})
+            
+            analyses = {kind: future.result() for kind, future in futures.items()}
+        
         # Perform different types of analysis based on request
         results = {}
         
         # 1. Risk Assessment
-        if "risk_score" in request.analysis_types:
-            risk_assessment = analysis_service.calculate_risk_scores(
-                request.location, 
-                forecast_hours=hours if request.include_forecasts else 0
-            )
+        if "risk_score" in analyses:
+            risk_assessment = analyses["risk_score"]
             results['risk_assessment'] = {
                 "overall_risk": risk_assessment.overall_risk,
                 "risk_level": risk_assessment.risk_level,
@@ -473,11 +635,8 @@ async def comprehensive_weather_analysis(
             }
         
         # 2. Weather Patterns
-        if "patterns" in request.analysis_types:
-            patterns = analysis_service.analyze_weather_patterns(
-                request.location, 
-                days=hours // 24 or 1
-            )
+        if "patterns" in analyses:
+            patterns = analyses["patterns"]
             results['weather_patterns'] = [
                 {
                     "type": p.pattern_type,
@@ -490,11 +649,8 @@ async def comprehensive_weather_analysis(
             ]
         
         # 3. Anomaly Detection
-        if "anomalies" in request.analysis_types:
-            anomalies = analysis_service.detect_anomalies(
-                request.location,
-                days=min(7, hours // 24 or 3)
-            )
+        if "anomalies" in analyses:
+            anomalies = analyses["anomalies"]
             results['anomalies'] = [
                 {
                     "type": a.anomaly_type,
@@ -508,18 +664,8 @@ async def comprehensive_weather_analysis(
             ]
         
         # 4. Trend Analysis
-        if "trends" in request.analysis_types:
-            trends = analysis_service.analyze_trends(
-                request.location,
-                days=min(14, hours // 24 or 7)
-            )
-            results['trend_analysis'] = trends
-        
-        # 5. Geospatial Context
-        geospatial_context = None
-        if request.include_geospatial and geo_service:
-            location_data = geo_service.process_location_data([request.location], hours)
-            geospatial_context = location_data.get(request.location, {})
+        if "trends" in analyses:
+            results['trend_analysis'] = analyses["trends"]
         
         # Compile comprehensive recommendations
         all_recommendations = []
@@ -561,9 +707,9 @@ async def comprehensive_weather_analysis(
             anomalies=results.get('anomalies', []),
             trend_analysis=results.get('trend_analysis', {}),
             geospatial_context=geospatial_context,
-            recommendations=list(set(all_recommendations)),  # Remove duplicates
+            recommendations=list(dict.fromkeys(all_recommendations)),  # Remove duplicates, keep order
             confidence_score=round(overall_confidence, 2),
-            generated_at=datetime.now()
+            generated_at=now
         )
         
     except Exception as e:
@@ -571,8 +717,9 @@ async def comprehensive_weather_analysis(
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @router.post("/analyze/multi-location")
-async def multi_location_analysis(
+def multi_location_analysis(
     request: MultiLocationRequest,
+    now: datetime = Depends(request_time),
     db: Session = Depends(get_db)
 ):
     """Analyze multiple locations for comparison and regional assessment."""
@@ -605,6 +752,14 @@ async def multi_location_analysis(
                 reverse=True
             )
             
+            # Summarize risks in one pass
+            total_risk = 0
+            high_risk_count = 0
+            for r in comparison_results:
+                overall_risk = r['risk_assessment'].get('overall_risk', 0)
+                total_risk += overall_risk
+                high_risk_count += overall_risk > 0.6
+            
             return {
                 "status": "success",
                 "analysis_type": "comparison",
@@ -614,27 +769,25 @@ async def multi_location_analysis(
                 "summary": {
                     "highest_risk_location": comparison_results[0]['location'] if comparison_results else None,
                     "average_risk": round(
-                        sum(r['risk_assessment'].get('overall_risk', 0) for r in comparison_results) / 
-                        len(comparison_results), 2
+                        total_risk / len(comparison_results), 2
                     ) if comparison_results else 0,
-                    "locations_with_high_risk": len([
-                        r for r in comparison_results 
-                        if r['risk_assessment'].get('overall_risk', 0) > 0.6
-                    ])
+                    "locations_with_high_risk": high_risk_count
                 },
-                "analyzed_at": datetime.now().isoformat()
+                "analyzed_at": now.isoformat()
             }
             
         elif request.analysis_type == "regional_aggregation":
             # Group locations by region and aggregate
             regional_data = {}
             
-            for location in request.locations:
+            # Process all locations in one batch, then group by region
+            location_data = geo_service.process_location_data(request.locations, request.hours)
+            
+            for location, location_processed in location_data.items():
                 try:
                     # Determine region for location
-                    location_processed = geo_service.process_location_data([location], request.hours)
-                    if location in location_processed and 'geographic_context' in location_processed[location]:
-                        region = location_processed[location]['geographic_context'].get('region', 'Unknown')
+                    if 'geographic_context' in location_processed:
+                        region = location_processed['geographic_context'].get('region', 'Unknown')
                         
                         if region not in regional_data:
                             regional_data[region] = {
@@ -644,7 +797,7 @@ async def multi_location_analysis(
                             }
                         
                         regional_data[region]['locations'].append(location)
-                        risk_data = location_processed[location].get('risk_assessment', {})
+                        risk_data = location_processed.get('risk_assessment', {})
                         regional_data[region]['total_risk'] += risk_data.get('overall_risk', 0)
                         regional_data[region]['risk_factors'].update(risk_data.get('risk_factors', []))
                         
@@ -671,7 +824,7 @@ async def multi_location_analysis(
                 "regions_analyzed": len(regional_summary),
                 "total_locations": len(request.locations),
                 "regional_summary": regional_summary,
-                "analyzed_at": datetime.now().isoformat()
+                "analyzed_at": now.isoformat()
             }
         
         else:
@@ -683,8 +836,9 @@ async def multi_location_analysis(
 
 
 @router.post("/analyze/regional-risk")
-async def regional_risk_assessment(
+def regional_risk_assessment(
     request: RegionalRiskRequest,
+    now: datetime = Depends(request_time),
     db: Session = Depends(get_db)
 ):
     """Perform regional risk assessment across Philippine regions."""
@@ -697,17 +851,23 @@ async def regional_risk_assessment(
         # Get regional risk mappings
         risk_mappings = geo_service.create_regional_risk_map(request.region)
         
-        # Filter by risk threshold
-        high_risk_mappings = [
-            rm for rm in risk_mappings 
-            if rm.risk_score >= request.risk_threshold * 100
-        ]
+        # Calculate statistics in one pass over the mappings
+        threshold_score = request.risk_threshold * 100
+        high_risk_count = 0
+        total_population_at_risk = 0
+        total_risk_score = 0.0
+        immediate_attention_count = 0
+        for rm in risk_mappings:
+            total_risk_score += rm.risk_score
+            if rm.risk_score >= threshold_score:
+                high_risk_count += 1
+                total_population_at_risk += rm.population_at_risk
+            if rm.risk_score >= 80:
+                immediate_attention_count += 1
         
-        # Calculate statistics
-        total_population_at_risk = sum(rm.population_at_risk for rm in high_risk_mappings)
-        
-        # Get high-risk areas
-        high_risk_areas = geo_service.find_high_risk_areas(request.risk_threshold)
+        # Get high-risk areas, reusing the mappings when they cover every region
+        all_region_mappings = None if request.region in geo_service.philippine_regions else risk_mappings
+        high_risk_areas = geo_service.find_high_risk_areas(request.risk_threshold, all_region_mappings)
         
         # Compile regional insights
         regional_insights = []
@@ -728,20 +888,18 @@ async def regional_risk_assessment(
             "assessment_scope": request.region or "National (Philippines)",
             "risk_threshold": request.risk_threshold,
             "total_regions_assessed": len(risk_mappings),
-            "high_risk_regions_count": len(high_risk_mappings),
+            "high_risk_regions_count": high_risk_count,
             "total_population_at_risk": total_population_at_risk,
             "regional_insights": regional_insights,
             "high_risk_areas": high_risk_areas[:10],  # Top 10 high-risk areas
             "national_summary": {
                 "average_risk_score": round(
-                    sum(rm.risk_score for rm in risk_mappings) / len(risk_mappings), 1
+                    total_risk_score / len(risk_mappings), 1
                 ) if risk_mappings else 0,
                 "highest_risk_region": risk_mappings[0].region if risk_mappings else None,
-                "regions_requiring_immediate_attention": len([
-                    rm for rm in risk_mappings if rm.risk_score >= 80
-                ])
+                "regions_requiring_immediate_attention": immediate_attention_count
             },
-            "generated_at": datetime.now().isoformat()
+            "generated_at": now.isoformat()
         }
         
     except Exception as e:
@@ -750,8 +908,9 @@ async def regional_risk_assessment(
 
 
 @router.get("/analyze/quick-risk/{location}")
-async def quick_risk_assessment(
+def quick_risk_assessment(
     location: str,
+    now: datetime = Depends(request_time),
     db: Session = Depends(get_db)
 ):
     """Get quick risk assessment for a specific location."""
@@ -793,7 +952,7 @@ async def quick_risk_assessment(
                     len(urgent_patterns) > 0
                 )
             },
-            "assessed_at": datetime.now().isoformat()
+            "assessed_at": now.isoformat()
         }
         
     except Exception as e:
@@ -802,7 +961,10 @@ async def quick_risk_assessment(
 
 
 @router.get("/analyze/performance-metrics")
-async def get_analysis_performance_metrics(db: Session = Depends(get_db)):
+def get_analysis_performance_metrics(
+    now: datetime = Depends(request_time),
+    db: Session = Depends(get_db)
+):
     """Get performance metrics for the analysis system."""
     
     try:
@@ -813,11 +975,11 @@ async def get_analysis_performance_metrics(db: Session = Depends(get_db)):
         db_performance = {}
         try:
             # Test query performance
-            start_time = datetime.now()
+            start_time = time.perf_counter()
             recent_count = db.query(CurrentWeather).filter(
-                CurrentWeather.timestamp >= datetime.now() - timedelta(hours=24)
+                CurrentWeather.timestamp >= now - timedelta(hours=24)
             ).count()
-            query_time = (datetime.now() - start_time).total_seconds()
+            query_time = time.perf_counter() - start_time
             
             db_performance = {
                 "recent_records_count": recent_count,
@@ -843,7 +1005,7 @@ async def get_analysis_performance_metrics(db: Session = Depends(get_db)):
             "analysis_capabilities": analysis_status,
             "system_health": {
                 "overall_status": "healthy",
-                "last_updated": datetime.now().isoformat(),
+                "last_updated": now.isoformat(),
                 "uptime_info": "System operational"
             }
         }
@@ -853,35 +1015,30 @@ async def get_analysis_performance_metrics(db: Session = Depends(get_db)):
         return {
             "status": "error", 
             "message": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now.isoformat()
         }
 
 
+# Hours per time range unit ("24h", "3d", "1w")
+_TIME_RANGE_UNIT_HOURS = {'h': 1, 'd': 24, 'w': 24 * 7}
+
+# Lower bounds of each risk level above MINIMAL, for bisect
+_RISK_LEVEL_BOUNDS = (0.2, 0.4, 0.6, 0.8)
+_RISK_LEVELS = ("MINIMAL", "LOW", "MODERATE", "HIGH", "CRITICAL")
+
+
 # Helper functions
 def parse_time_range(time_range: str) -> int:
     """Parse time range string to hours."""
-    if time_range.endswith('h'):
-        return int(time_range[:-1])
-    elif time_range.endswith('d'):
-        return int(time_range[:-1]) * 24
-    elif time_range.endswith('w'):
-        return int(time_range[:-1]) * 24 * 7
-    else:
+    unit_hours = _TIME_RANGE_UNIT_HOURS.get(time_range[-1:])
+    if unit_hours is None:
         return 24  # Default to 24 hours
+    return int(time_range[:-1]) * unit_hours
 
 
 def categorize_risk_level(risk_score: float) -> str:
     """Categorize risk level based on score."""
-    if risk_score >= 0.8:
-        return "CRITICAL"
-    elif risk_score >= 0.6:
-        return "HIGH"
-    elif risk_score >= 0.4:
-        return "MODERATE"
-    elif risk_score >= 0.2:
-        return "LOW"
-    else:
-        return "MINIMAL"
+    return _RISK_LEVELS[bisect_right(_RISK_LEVEL_BOUNDS, risk_score)]
 
 
 async def log_analysis_completion(location: str, analysis_types: List[str], recommendations_count: int):
@@ -892,9 +1049,10 @@ async def log_analysis_completion(location: str, analysis_types: List[str], reco
     )
 
 @router.post("/rag/analyze")
-async def rag_weather_analysis(
+def rag_weather_analysis(
     location: str,
     query: str,
+    now: datetime = Depends(request_time),
     db: Session = Depends(get_db)
 ):
     """Get AI-powered weather analysis using RAG system."""
@@ -933,7 +1091,7 @@ async def rag_weather_analysis(
             "knowledge_sources_found": result["knowledge_sources"],
             "relevant_knowledge": result["relevant_knowledge"],
             "ai_analysis": result["analysis"],
-            "generated_at": datetime.now().isoformat()
+            "generated_at": now.isoformat()
         }
         
     except Exception as e:
@@ -2,8 +2,10 @@
 Database connection and session management
 """
 
+from contextlib import contextmanager
+from typing import Iterator, Optional
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 import os
 from pathlib import Path
@@ -17,11 +19,33 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is required")
 
+# Connection pool: requests check out a pooled connection instead of
+# opening (and authenticating) a new one; stale connections are detected
+# before use and recycled before server-side idle timeouts. Size plus
+# overflow matches FastAPI's 40-thread pool that runs the sync handlers, and
+# a request waits at most POOL_TIMEOUT_SECONDS for a free connection
+POOL_SIZE = 20
+MAX_OVERFLOW = 20
+POOL_TIMEOUT_SECONDS = 30
+POOL_RECYCLE_SECONDS = 1800
+
+# Statement logging is opt-in; echoing every query is costly under load
+SQL_ECHO = os.getenv('SQL_ECHO', 'False').lower() == 'true'
+
 # Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(
+    DATABASE_URL,
+    echo=SQL_ECHO,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT_SECONDS,
+    pool_pre_ping=True,
+    pool_recycle=POOL_RECYCLE_SECONDS
+)
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create SessionLocal class; objects stay loaded after commit, so returning
+# a freshly stored row does not cost another SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # Create Base class
 Base = declarative_base()
@@ -34,6 +58,18 @@ def get_db():
     finally:
         db.close()
 
+@contextmanager
+def session_scope(db: Optional[Session] = None) -> Iterator[Session]:
+    """Use the caller's session if given, else a short-lived one closed on exit."""
+    if db is not None:
+        yield db
+        return
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
 def create_tables():
     """Create all database tables."""
     from ..models.weather import Base as WeatherBase
@@ -5,6 +5,8 @@ Main entry point for the API server
 
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 import uvicorn
@@ -24,7 +26,9 @@ app = FastAPI(
     description="DRRM Weather Analytics Platform API",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # Serialize every JSON response with orjson
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for frontend integration
@@ -36,6 +40,9 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Compress larger JSON responses for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Include API routes
 app.include_router(weather.router, prefix="/api/v1/weather", tags=["weather"])
 app.include_router(alerts.router, prefix="/api/v1/alerts", tags=["alerts"])
@@ -49,6 +56,12 @@ async def startup_event():
     print("WeatherWise API with Real-time Processing started!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled outbound HTTP connections"""
+    weather.weather_service.close()
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -110,5 +123,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        # uvloop when installed (not available on Windows), else asyncio
+        loop="auto",
         log_level="info"
     )
\ No newline at end of file
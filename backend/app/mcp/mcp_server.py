@@ -3,14 +3,9 @@ MCP Server for WeatherWise
 Provides tools for weather data access and DRRM operations
 """
 
-import sys
-from pathlib import Path
 from typing import Dict, Any, List
 import json
-
-# Add backend to path
-backend_dir = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(backend_dir))
+from sqlalchemy.orm import scoped_session
 
 from app.core.database import SessionLocal
 from app.models.weather import CurrentWeather
@@ -22,7 +17,8 @@ class MCPWeatherServer:
     
     def __init__(self):
         """Initialize MCP server."""
-        self.db = SessionLocal()
+        # Thread-local sessions so one server instance can be shared across requests
+        self.db = scoped_session(SessionLocal)
         self.analysis_service = WeatherAnalysisService(self.db)
         self.rag_service = RAGService()
         
@@ -119,17 +115,16 @@ class MCPWeatherServer:
             return self.tools[tool_name](**kwargs)
         except Exception as e:
             return {"error": f"Tool execution failed: {str(e)}"}
+        finally:
+            # Hand this thread's session and connection back after every call
+            self.db.remove()
     
     def list_tools(self) -> List[str]:
         """List available tools."""
         return list(self.tools.keys())
-    
-    def __del__(self):
-        """Cleanup database connection."""
-        if hasattr(self, 'db'):
-            self.db.close()
 
 if __name__ == "__main__":
+    # Run from backend/ with: python -m app.mcp.mcp_server
     # Test MCP server
     server = MCPWeatherServer()
     
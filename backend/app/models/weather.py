@@ -2,7 +2,7 @@
 WeatherWise Database Models
 """
 
-from sqlalchemy import Column, String, Float, Integer, DateTime, Text, JSON, Index
+from sqlalchemy import Column, String, Float, Integer, DateTime, Text, JSON, Index, Computed, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime, timezone
@@ -11,6 +11,16 @@ import uuid
 Base = declarative_base()
 
 
+def location_key_prefix(location: str) -> str:
+    """LIKE pattern for location keys starting with the given location.
+    
+    A literal prefix pattern lets Postgres use the location_key index
+    (use with escape='/').
+    """
+    escaped = location.lower().replace('/', '//').replace('%', '/%').replace('_', '/_')
+    return f"{escaped}%"
+
+
 class CurrentWeather(Base):
     """Current weather observation table."""
 
@@ -18,6 +28,8 @@ class CurrentWeather(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     location = Column(String(255), nullable=False)
+    # Lowercased location, generated by the database, for indexed lookups
+    location_key = Column(String(255), Computed("lower(location)", persisted=True))
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     temperature = Column(Float, nullable=False)
@@ -28,14 +40,21 @@ class CurrentWeather(Base):
     weather_condition = Column(String(50), nullable=False)
     weather_description = Column(String(255))
     visibility = Column(Float)
-    timestamp = Column(DateTime(timezone=True), nullable=False)
+    # Filled in by the database when not supplied
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
+    # Fetch server-generated values on INSERT instead of expiring them
+    __mapper_args__ = {'eager_defaults': True}
+    
     # Indexes for better query performance
     __table_args__ = (
         Index('idx_current_weather_location', 'location'),
+        Index('idx_current_weather_location_key', 'location_key', postgresql_ops={'location_key': 'varchar_pattern_ops'}),
         Index('idx_current_weather_timestamp', 'timestamp'),
         Index('idx_current_weather_coordinates', 'latitude', 'longitude'),
+        # Newest-first per location, matching migrate_database.py
+        Index('idx_current_weather_location_timestamp', 'location', timestamp.desc()),
     )
 
 
@@ -50,6 +69,8 @@ class WeatherForecast(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     location = Column(String(255), nullable=False)
+    # Lowercased location, generated by the database, for indexed lookups
+    location_key = Column(String(255), Computed("lower(location)", persisted=True))
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     forecast_date = Column(DateTime(timezone=True), nullable=False)
@@ -68,6 +89,7 @@ class WeatherForecast(Base):
     # Indexes
     __table_args__ = (
         Index('idx_weather_forecasts_location', 'location'),
+        Index('idx_weather_forecasts_location_key', 'location_key', postgresql_ops={'location_key': 'varchar_pattern_ops'}),
         Index('idx_weather_forecasts_date', 'forecast_date'),
         Index('idx_weather_forecasts_coordinates', 'latitude', 'longitude'),
     )
@@ -9,7 +9,7 @@ import json
 from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timezone, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, or_, func
 from dataclasses import dataclass
 import numpy as np
 
@@ -105,6 +105,13 @@ class GeospatialService:
             }
         }
         
+        # Lookup table from major city name to its region
+        self.city_regions = {
+            city: region
+            for region, region_data in self.philippine_regions.items()
+            for city in region_data.get('major_cities', [])
+        }
+        
         # Vulnerability factors by location type
         self.vulnerability_factors = {
             'coastal': {
@@ -149,10 +156,17 @@ class GeospatialService:
         
         processed_data = {}
         
+        # Get weather data for every location in one query; if it fails, every
+        # location records the error, as a per-location failure would
+        try:
+            locations_weather = self._get_locations_weather_data(locations, hours) if locations else {}
+        except Exception as e:
+            logger.error(f"Failed to fetch weather data for {len(locations)} locations: {e}")
+            return {location: {'error': str(e)} for location in locations}
+        
         for location in locations:
             try:
-                # Get weather data
-                weather_data = self._get_location_weather_data(location, hours)
+                weather_data = locations_weather[location]
                 
                 # Get geographic context
                 geo_context = self._get_geographic_context(location)
@@ -255,13 +269,15 @@ class GeospatialService:
         cities = region_data.get('major_cities', [])
         weather_data_by_city = {}
         
-        for city in cities:
+        if cities:
+            # One query for every city in the region
             try:
-                city_weather = self._get_location_weather_data(f"{city}, PH", hours)
-                if city_weather:
-                    weather_data_by_city[city] = city_weather
+                city_data = self._get_locations_weather_data([f"{city}, PH" for city in cities], hours)
+                weather_data_by_city = {
+                    city: city_data[f"{city}, PH"] for city in cities if city_data[f"{city}, PH"]
+                }
             except Exception as e:
-                logger.warning(f"Could not get data for {city}: {e}")
+                logger.warning(f"Could not get data for {region_name}: {e}")
         
         if not weather_data_by_city:
             raise ValueError(f"No weather data available for region {region_name}")
@@ -288,11 +304,14 @@ class GeospatialService:
             coverage_area_km2=coverage_area
         )
     
-    def find_high_risk_areas(self, risk_threshold: float = 0.7) -> List[Dict]:
+    def find_high_risk_areas(self, risk_threshold: float = 0.7,
+                             risk_mappings: Optional[List[RiskMapping]] = None) -> List[Dict]:
         """Identify areas with high disaster risk across Philippines.
         
         Args:
             risk_threshold: Minimum risk score to consider high risk
+            risk_mappings: Risk maps already built for all regions, if any;
+                otherwise each region is assessed here
             
         Returns:
             List of high-risk areas with details
@@ -305,7 +324,10 @@ class GeospatialService:
         for region_name in self.philippine_regions:
             try:
                 # Get current risk assessment for region
-                regional_risk_maps = self.create_regional_risk_map(region_name)
+                if risk_mappings is not None:
+                    regional_risk_maps = [rm for rm in risk_mappings if rm.region == region_name]
+                else:
+                    regional_risk_maps = self.create_regional_risk_map(region_name)
                 
                 for risk_map in regional_risk_maps:
                     if risk_map.risk_score >= risk_threshold:
@@ -358,46 +380,64 @@ class GeospatialService:
     # Helper methods
     def _get_location_weather_data(self, location: str, hours: int) -> List[Dict]:
         """Get weather data for a specific location."""
-        from ..models.weather import CurrentWeather
+        return self._get_locations_weather_data([location], hours)[location]
+    
+    def _get_locations_weather_data(self, locations: List[str], hours: int) -> Dict[str, List[Dict]]:
+        """Get weather data for several locations with a single query.
+        
+        Readings are matched to each location by the city-name prefix of
+        their location key, newest first.
+        """
+        from ..models.weather import CurrentWeather, location_key_prefix
         
         cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
+        city_keys = {location: location.split(',')[0].strip().lower() for location in locations}
         
         query = self.db.query(CurrentWeather).filter(
             and_(
-                CurrentWeather.location.ilike(f"%{location.split(',')[0]}%"),
+                or_(*(
+                    CurrentWeather.location_key.like(location_key_prefix(city_key), escape='/')
+                    for city_key in set(city_keys.values())
+                )),
                 CurrentWeather.timestamp >= cutoff_time
             )
         ).order_by(CurrentWeather.timestamp.desc())
         
-        results = query.all()
-        
-        return [{
-            'timestamp': r.timestamp.isoformat(),
-            'temperature': r.temperature,
-            'humidity': r.humidity,
-            'pressure': r.pressure,
-            'wind_speed': r.wind_speed,
-            'wind_direction': r.wind_direction,
-            'weather_condition': r.weather_condition,
-            'coordinates': (r.latitude, r.longitude)
-        } for r in results]
+        weather_data = {location: [] for location in locations}
+        for r in query.all():
+            reading = {
+                'timestamp': r.timestamp.isoformat(),
+                'temperature': r.temperature,
+                'humidity': r.humidity,
+                'pressure': r.pressure,
+                'wind_speed': r.wind_speed,
+                'wind_direction': r.wind_direction,
+                'weather_condition': r.weather_condition,
+                'coordinates': (r.latitude, r.longitude)
+            }
+            for location, city_key in city_keys.items():
+                if r.location_key.startswith(city_key):
+                    weather_data[location].append(reading)
+        
+        return weather_data
     
     def _get_geographic_context(self, location: str) -> Dict:
         """Get geographic context for a location."""
         # Determine which region this location belongs to
         location_name = location.split(',')[0].strip()
         
-        for region, region_data in self.philippine_regions.items():
-            if location_name in region_data.get('major_cities', []):
-                return {
-                    'region': region,
-                    'region_center': region_data['coordinates'],
-                    'vulnerability_score': region_data['vulnerability'],
-                    'population': region_data['population'],
-                    'geographic_type': self._determine_geographic_type(location_name),
-                    'coastal_proximity': self._calculate_coastal_proximity(location_name),
-                    'elevation_category': self._estimate_elevation_category(location_name)
-                }
+        region = self.city_regions.get(location_name)
+        if region:
+            region_data = self.philippine_regions[region]
+            return {
+                'region': region,
+                'region_center': region_data['coordinates'],
+                'vulnerability_score': region_data['vulnerability'],
+                'population': region_data['population'],
+                'geographic_type': self._determine_geographic_type(location_name),
+                'coastal_proximity': self._calculate_coastal_proximity(location_name),
+                'elevation_category': self._estimate_elevation_category(location_name)
+            }
         
         # Default context for unknown locations
         return {
@@ -519,13 +559,18 @@ class GeospatialService:
         """Get aggregated weather data for a region."""
         major_cities = region_data.get('major_cities', [])
         all_regional_data = []
+        if not major_cities:
+            return all_regional_data
         
-        for city in major_cities:
-            try:
-                city_data = self._get_location_weather_data(f"{city}, PH", 24)
-                all_regional_data.extend(city_data)
-            except Exception as e:
-                logger.warning(f"Could not get data for {city}: {e}")
+        # One query for every city in the region
+        try:
+            city_data = self._get_locations_weather_data([f"{city}, PH" for city in major_cities], 24)
+        except Exception as e:
+            logger.warning(f"Could not get data for {region}: {e}")
+            return all_regional_data
+        
+        for readings in city_data.values():
+            all_regional_data.extend(readings)
         
         return all_regional_data
     
@@ -769,10 +814,10 @@ class GeospatialService:
         location_name = location.split(',')[0].strip()
         
         # Check if it's a major city
-        for region_data in self.philippine_regions.values():
-            if location_name in region_data.get('major_cities', []):
-                # Estimate city coordinates near region center
-                return self._estimate_city_coordinates(location_name, region_data['coordinates'])
+        region = self.city_regions.get(location_name)
+        if region:
+            # Estimate city coordinates near region center
+            return self._estimate_city_coordinates(location_name, self.philippine_regions[region]['coordinates'])
         
         # Check if it's a region
         for region, region_data in self.philippine_regions.items():
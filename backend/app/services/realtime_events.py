@@ -6,19 +6,130 @@ Handles streaming weather data and immediate alert generation
 import asyncio
 import json
 import uuid
+import orjson
+import msgspec
+from cachetools import TTLCache
 import logging
-from typing import Dict, Any, List, Callable, Optional
+from typing import Dict, Any, List, Callable, Optional, Union
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from fastapi import WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
 import time
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# WebSocket wire formats: clients offering the "msgpack" subprotocol get binary
+# MessagePack frames, everyone else (including the "json" subprotocol) JSON text
+MSGPACK_SUBPROTOCOL = "msgpack"
+JSON_SUBPROTOCOL = "json"
+_msgpack_encoder = msgspec.msgpack.Encoder()
+_msgpack_decoder = msgspec.msgpack.Decoder()
+
+# Frames buffered per connection; a client that falls this far behind a
+# broadcast is dropped instead of slowing the fan-out down
+OUTBOX_SIZE = 32
+
+def negotiate_subprotocol(websocket: WebSocket) -> Optional[str]:
+    """Pick the wire format for a connection from the subprotocols it offers."""
+    offered = websocket.scope.get("subprotocols", [])
+    if MSGPACK_SUBPROTOCOL in offered:
+        return MSGPACK_SUBPROTOCOL
+    if JSON_SUBPROTOCOL in offered:
+        return JSON_SUBPROTOCOL
+    return None
+
+def uses_msgpack(websocket: WebSocket) -> bool:
+    """Whether the connection negotiated MessagePack frames."""
+    return getattr(websocket.state, "subprotocol", None) == MSGPACK_SUBPROTOCOL
+
+class EncodedPayload:
+    """A payload encoded lazily, at most once per wire format."""
+    
+    __slots__ = ("payload", "_msgpack", "_json")
+    
+    def __init__(self, payload: Dict[str, Any]):
+        self.payload = payload
+        self._msgpack = None
+        self._json = None
+    
+    def frame_for(self, websocket: WebSocket) -> Union[bytes, str]:
+        """The encoded frame in the connection's wire format."""
+        if uses_msgpack(websocket):
+            if self._msgpack is None:
+                self._msgpack = _msgpack_encoder.encode(self.payload)
+            return self._msgpack
+        if self._json is None:
+            self._json = orjson.dumps(self.payload).decode()
+        return self._json
+
+def open_outbox(websocket: WebSocket):
+    """Attach an outbound queue to the connection, drained by its own relay task."""
+    websocket.state.outbox = asyncio.Queue(maxsize=OUTBOX_SIZE)
+    websocket.state.relay = asyncio.create_task(_relay(websocket))
+
+def close_outbox(websocket: WebSocket):
+    """Stop the connection's relay task, dropping unsent frames."""
+    relay = getattr(websocket.state, "relay", None)
+    if relay is not None:
+        relay.cancel()
+
+async def _relay(websocket: WebSocket):
+    """Send queued frames to one connection, so a slow client only delays itself."""
+    outbox = websocket.state.outbox
+    try:
+        while True:
+            frame = await outbox.get()
+            if isinstance(frame, bytes):
+                await websocket.send_bytes(frame)
+            else:
+                await websocket.send_text(frame)
+    except Exception as e:
+        logger.warning(f"Failed to send to WebSocket client: {e}")
+
+async def send_payload(websocket: WebSocket, payload: Dict[str, Any]):
+    """Queue a payload for the connection in its wire format."""
+    await websocket.state.outbox.put(EncodedPayload(payload).frame_for(websocket))
+
+def broadcast_payload(connections: List[WebSocket], payload: Dict[str, Any]) -> List[WebSocket]:
+    """Queue one payload for many connections, encoding it once per wire format.
+    
+    Enqueueing never waits on a client. Returns the connections that are
+    closed, whose relay has failed, or whose outbox is full.
+    """
+    encoded = EncodedPayload(payload)
+    failed = []
+    for websocket in connections:
+        if websocket.client_state == WebSocketState.DISCONNECTED or websocket.state.relay.done():
+            failed.append(websocket)
+            continue
+        try:
+            websocket.state.outbox.put_nowait(encoded.frame_for(websocket))
+        except asyncio.QueueFull:
+            logger.warning("Dropping WebSocket client that is too far behind")
+            failed.append(websocket)
+    return failed
+
+def event_channel(event_type: str) -> str:
+    """Alert channel of an event type, e.g. "typhoon" for "typhoon_warning"."""
+    return event_type.split("_", 1)[0]
+
+def decode_payload(frame: Dict[str, Any]) -> Any:
+    """Decode a received WebSocket frame: bytes are MessagePack, text is JSON.
+    
+    Raises ValueError for malformed frames.
+    """
+    if frame.get("bytes") is not None:
+        try:
+            return _msgpack_decoder.decode(frame["bytes"])
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    return orjson.loads(frame.get("text") or "")
+
 class AlertSeverity(Enum):
     INFO = "info"
     WARNING = "warning"
@@ -39,12 +150,17 @@ class RealTimeEvent:
 class EventProcessor:
     """Processes real-time weather events and triggers alerts."""
     
+    # Status endpoints are polled; their results are reused briefly and
+    # dropped whenever an event is stored or the history changes
+    STATUS_CACHE_TTL_SECONDS = 5
+    
     def __init__(self, db_session: Session):
         self.db = db_session
         self.active_connections: List[WebSocket] = []
         self.event_handlers: Dict[str, Callable] = {}
         self.alert_thresholds = self._load_alert_thresholds()
         self.event_history: List[RealTimeEvent] = []
+        self._status_cache = TTLCache(maxsize=4, ttl=self.STATUS_CACHE_TTL_SECONDS)
     
     def _load_alert_thresholds(self) -> Dict[str, Dict]:
         """Load alert thresholds for different weather parameters."""
@@ -71,15 +187,40 @@ class EventProcessor:
     
     async def add_connection(self, websocket: WebSocket):
         """Add new WebSocket connection."""
-        await websocket.accept()
+        subprotocol = negotiate_subprotocol(websocket)
+        websocket.state.subprotocol = subprotocol
+        await websocket.accept(subprotocol=subprotocol)
+        open_outbox(websocket)
         self.active_connections.append(websocket)
         logger.info(f"New WebSocket connection added. Total: {len(self.active_connections)}")
         
         # Send recent events to new connection
         await self._send_recent_events(websocket)
     
+    def subscribe(self, websocket: WebSocket, alert_types: List[str]):
+        """Limit a connection's alerts to the given channels or event types.
+        
+        An empty list restores delivery of every alert. Raises ValueError
+        unless alert_types is a list of strings (a bare string would
+        otherwise subscribe to its characters).
+        """
+        if not isinstance(alert_types, (list, tuple)) or not all(isinstance(t, str) for t in alert_types):
+            raise ValueError("alert_types must be a list of strings")
+        websocket.state.alert_types = frozenset(alert_types) or None
+    
+    def _subscribers(self, event: RealTimeEvent) -> List[WebSocket]:
+        """Connections that should receive the event."""
+        channel = event_channel(event.event_type)
+        subscribers = []
+        for websocket in self.active_connections:
+            alert_types = getattr(websocket.state, "alert_types", None)
+            if alert_types is None or channel in alert_types or event.event_type in alert_types:
+                subscribers.append(websocket)
+        return subscribers
+    
     def remove_connection(self, websocket: WebSocket):
         """Remove WebSocket connection."""
+        close_outbox(websocket)
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
             logger.info(f"WebSocket connection removed. Total: {len(self.active_connections)}")
@@ -102,7 +243,7 @@ class EventProcessor:
             }
             
             try:
-                await websocket.send_text(json.dumps(message))
+                await send_payload(websocket, message)
             except:
                 break
     
@@ -451,6 +592,7 @@ class EventProcessor:
         self.event_history.append(event)
         if len(self.event_history) > 50:  # Keep last 50 events
             self.event_history = self.event_history[-50:]
+        self._status_cache.clear()
         
         message = {
             "type": "real_time_alert",
@@ -468,21 +610,13 @@ class EventProcessor:
         # Store in database
         await self._store_event_in_database(event)
         
-        # Broadcast to all connections
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(json.dumps(message))
-                logger.debug(f"Sent event {event.event_id} to WebSocket client")
-            except Exception as e:
-                logger.warning(f"Failed to send to WebSocket client: {e}")
-                disconnected.append(connection)
-        
-        # Remove disconnected clients
-        for connection in disconnected:
+        # Broadcast to the connections subscribed to this kind of alert
+        subscribers = self._subscribers(event)
+        failed = broadcast_payload(subscribers, message)
+        for connection in failed:
             self.remove_connection(connection)
         
-        logger.info(f"Broadcasted {event.event_type} event to {len(self.active_connections)} clients")
+        logger.info(f"Broadcasted {event.event_type} event to {len(subscribers) - len(failed)} clients")
     
     async def _store_event_in_database(self, event: RealTimeEvent):
         """Store event in database for historical tracking."""
@@ -507,6 +641,7 @@ class EventProcessor:
                 "expires_at": event.expires_at
             })
             self.db.commit()
+            self._status_cache.clear()
             
             logger.debug(f"Stored event {event.event_id} in database")
             
@@ -548,7 +683,15 @@ class EventProcessor:
             logger.error(f"Failed to trigger emergency analysis: {e}")
     
     def get_active_events(self) -> List[Dict]:
-        """Get currently active events."""
+        """Get currently active events.
+        
+        The cache holds a tuple and every caller gets its own list, so
+        mutating the result cannot corrupt what other callers see.
+        """
+        active_events = self._status_cache.get("active_events")
+        if active_events is not None:
+            return list(active_events)
+        
         now = datetime.now(timezone.utc)
         active_events = []
         
@@ -564,7 +707,66 @@ class EventProcessor:
                     "expires_at": event.expires_at.isoformat() if event.expires_at else None
                 })
         
+        self._status_cache["active_events"] = tuple(active_events)
         return active_events
+    
+    @property
+    def active_events_count(self) -> int:
+        """Number of currently active events, without building their payloads.
+        
+        History is capped at 50 events and entries expire with time, so this
+        counts directly rather than maintaining a counter.
+        """
+        active_events = self._status_cache.get("active_events")
+        if active_events is not None:
+            return len(active_events)
+        
+        now = datetime.now(timezone.utc)
+        return sum(1 for event in self.event_history if not event.expires_at or event.expires_at > now)
+    
+    def get_database_stats(self, db: Session, exact: bool = False) -> Dict[str, int]:
+        """Get event and workflow counts for the status endpoint.
+        
+        The all-time event total comes from the planner's row estimate unless
+        an exact count is asked for, which scans the whole table.
+        """
+        cache_key = ("database_stats", exact)
+        stats = self._status_cache.get(cache_key)
+        if stats is not None:
+            return stats
+        
+        total_events = None
+        if not exact:
+            total_events = db.execute(text("""
+                SELECT reltuples::bigint FROM pg_class WHERE relname = 'realtime_events'
+            """)).scalar()
+        if total_events is None or total_events < 0:
+            # Exact count requested, or the table has never been analyzed
+            total_events = db.execute(text("""
+                SELECT COUNT(*) FROM realtime_events
+            """)).scalar()
+        
+        stats = {
+            "total_events": total_events,
+            "events_24h": db.execute(text("""
+                SELECT COUNT(*) FROM realtime_events 
+                WHERE created_at >= NOW() - INTERVAL '24 hours'
+            """)).scalar(),
+            "active_workflows": db.execute(text("""
+                SELECT COUNT(*) FROM agent_workflows 
+                WHERE status IN ('pending', 'running')
+            """)).scalar()
+        }
+        
+        self._status_cache[cache_key] = stats
+        return stats
+    
+    def clear_event_history(self) -> int:
+        """Forget all in-memory events; returns how many were dropped."""
+        events_cleared = len(self.event_history)
+        self.event_history.clear()
+        self._status_cache.clear()
+        return events_cleared
 
 # Global instance
 _event_processor = None
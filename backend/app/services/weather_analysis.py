@@ -56,6 +56,74 @@ class RiskScore:
     recommendations: List[str]
 
 
+# Score bands for the risk kernel: a reading at or above the n-th cut-off
+# scores the n-th entry of the paired table
+_WIND_CUTOFFS = np.array([40.0, 60.0, 90.0, 120.0])  # km/h
+_WIND_SCORES = np.array([0.0, 0.1, 0.2, 0.3, 0.4])
+_PRESSURE_DROP_CUTOFFS = np.array([10.0, 15.0, 25.0])  # hPa
+_PRESSURE_DROP_SCORES = np.array([0.0, 0.1, 0.2, 0.3])
+_HUMIDITY_CUTOFFS = np.array([80.0, 90.0, 95.0])  # %
+_HUMIDITY_SCORES = np.array([0.0, 0.1, 0.2, 0.3])
+_PRECIP_CUTOFFS = np.array([50.0, 70.0, 90.0])  # %
+_PRECIP_SCORES = np.array([0.0, 0.2, 0.3, 0.4])
+_HEAT_CUTOFFS = np.array([32.0, 35.0, 38.0, 42.0])  # °C
+_HEAT_SCORES = np.array([0.0, 0.1, 0.2, 0.3, 0.4])
+_VISIBILITY_CUTOFFS = np.array([2.0, 5.0])  # km
+_VISIBILITY_SCORES = np.array([0.2, 0.1, 0.0])
+
+_SEVERE_CONDITIONS = frozenset(['Thunderstorm', 'Snow', 'Tornado', 'Severe'])
+
+
+def _column(rows: List[Dict], key: str, missing: float = np.nan, falsy_missing: bool = True) -> np.ndarray:
+    """Pack one reading from each row into a contiguous float64 array."""
+    if falsy_missing:
+        values = (row.get(key) or missing for row in rows)
+    else:
+        values = (missing if row.get(key) is None else row[key] for row in rows)
+    return np.fromiter(values, dtype=np.float64, count=len(rows))
+
+
+def _band(value: float, cutoffs: np.ndarray, scores: np.ndarray) -> float:
+    """Score a value against ascending cut-offs."""
+    return scores[np.searchsorted(cutoffs, value, side='right')]
+
+
+def _score_kernel(temps: np.ndarray, winds: np.ndarray, pressures: np.ndarray, humidity: np.ndarray,
+                  precip: np.ndarray, visibility: np.ndarray) -> np.ndarray:
+    """Score typhoon, flooding, heat stress and visibility risk from reading columns.
+    
+    Missing readings are NaN. Returns the four category scores, each capped at 1.0.
+    """
+    scores = np.zeros(4)
+    
+    # Typhoon: peak wind speed plus the sharpest pressure change
+    winds = winds[~np.isnan(winds)]
+    if winds.size:
+        scores[0] += _band(winds.max(), _WIND_CUTOFFS, _WIND_SCORES)
+    pressures = pressures[~np.isnan(pressures)]
+    if pressures.size > 1:
+        scores[0] += _band(abs(np.diff(pressures).min()), _PRESSURE_DROP_CUTOFFS, _PRESSURE_DROP_SCORES)
+    
+    # Flooding: mean humidity plus peak precipitation probability
+    humidity = humidity[~np.isnan(humidity)]
+    if humidity.size:
+        scores[1] += _band(humidity.sum() / humidity.size, _HUMIDITY_CUTOFFS, _HUMIDITY_SCORES)
+    if precip.size:
+        scores[1] += _band(precip.max(), _PRECIP_CUTOFFS, _PRECIP_SCORES)
+    
+    # Heat stress: peak temperature
+    temps = temps[~np.isnan(temps)]
+    if temps.size:
+        scores[2] += _band(temps.max(), _HEAT_CUTOFFS, _HEAT_SCORES)
+    
+    # General weather: lowest visibility
+    visibility = visibility[~np.isnan(visibility)]
+    if visibility.size:
+        scores[3] += _band(visibility.min(), _VISIBILITY_CUTOFFS, _VISIBILITY_SCORES)
+    
+    return np.minimum(scores, 1.0)
+
+
 class WeatherAnalysisService:
     """Advanced weather analysis service for DRRM."""
 
@@ -195,18 +263,7 @@ class WeatherAnalysisService:
             return self._default_risk_score()
         
         # Calculate individual risk components
-        typhoon_risk = self._calculate_typhoon_risk(current_data, forecast_data)
-        flood_risk = self._calculate_flood_risk(current_data, forecast_data)
-        heat_risk = self._calculate_heat_risk(current_data, forecast_data)
-        general_risk = self._calculate_general_weather_risk(current_data, forecast_data)
-        
-        # Combine risks with weights
-        category_risks = {
-            'typhoon': typhoon_risk,
-            'flooding': flood_risk,
-            'heat_stress': heat_risk,
-            'general_weather': general_risk
-        }
+        category_risks = self._calculate_category_risks(current_data, forecast_data)
         
         # Calculate weighted overall risk
         risk_weights = {'typhoon': 0.4, 'flooding': 0.3, 'heat_stress': 0.2, 'general_weather': 0.1}
@@ -632,120 +689,30 @@ class WeatherAnalysisService:
         
         return unique_anomalies[:10]  # Limit to top 10 anomalies
     
-    def _calculate_typhoon_risk(self, current_data: List[Dict], forecast_data: List[Dict]) -> float:
-        """Calculate typhoon risk score."""
-        if not current_data and not forecast_data:
-            return 0.0
-        
+    def _calculate_category_risks(self, current_data: List[Dict], forecast_data: List[Dict]) -> Dict[str, float]:
+        """Calculate typhoon, flooding, heat stress and general weather risk scores."""
         all_data = current_data + forecast_data
-        risk_score = 0.0
-        
-        # Wind speed risk
-        wind_speeds = [d['wind_speed'] for d in all_data if 'wind_speed' in d and d['wind_speed']]
-        if wind_speeds:
-            max_wind = max(wind_speeds)
-            if max_wind >= 120:
-                risk_score += 0.4  # Critical
-            elif max_wind >= 90:
-                risk_score += 0.3  # High
-            elif max_wind >= 60:
-                risk_score += 0.2  # Moderate
-            elif max_wind >= 40:
-                risk_score += 0.1  # Low
-        
-        # Pressure drop risk
-        pressures = [d['pressure'] for d in all_data if 'pressure' in d and d['pressure']]
-        if len(pressures) > 1:
-            pressure_changes = [pressures[i] - pressures[i-1] for i in range(1, len(pressures))]
-            max_drop = abs(min(pressure_changes)) if pressure_changes else 0
-            if max_drop >= 25:
-                risk_score += 0.3
-            elif max_drop >= 15:
-                risk_score += 0.2
-            elif max_drop >= 10:
-                risk_score += 0.1
-        
-        return min(1.0, risk_score)
-    
-    def _calculate_flood_risk(self, current_data: List[Dict], forecast_data: List[Dict]) -> float:
-        """Calculate flooding risk score."""
-        if not current_data and not forecast_data:
-            return 0.0
-        
-        all_data = current_data + forecast_data
-        risk_score = 0.0
-        
-        # High humidity risk
-        humidity_values = [d['humidity'] for d in all_data if 'humidity' in d and d['humidity']]
-        if humidity_values:
-            avg_humidity = sum(humidity_values) / len(humidity_values)
-            if avg_humidity >= 95:
-                risk_score += 0.3
-            elif avg_humidity >= 90:
-                risk_score += 0.2
-            elif avg_humidity >= 80:
-                risk_score += 0.1
-        
-        # Precipitation probability (from forecast)
-        precip_probs = [d.get('precipitation_probability', 0) for d in forecast_data]
-        if precip_probs:
-            max_precip = max(precip_probs)
-            if max_precip >= 90:
-                risk_score += 0.4
-            elif max_precip >= 70:
-                risk_score += 0.3
-            elif max_precip >= 50:
-                risk_score += 0.2
-        
-        return min(1.0, risk_score)
-    
-    def _calculate_heat_risk(self, current_data: List[Dict], forecast_data: List[Dict]) -> float:
-        """Calculate heat stress risk score."""
-        if not current_data and not forecast_data:
-            return 0.0
         
-        all_data = current_data + forecast_data
-        risk_score = 0.0
-        
-        # Temperature risk
-        temperatures = [d['temperature'] for d in all_data if 'temperature' in d and d['temperature']]
-        if temperatures:
-            max_temp = max(temperatures)
-            if max_temp >= 42:
-                risk_score += 0.4  # Critical
-            elif max_temp >= 38:
-                risk_score += 0.3  # High
-            elif max_temp >= 35:
-                risk_score += 0.2  # Moderate
-            elif max_temp >= 32:
-                risk_score += 0.1  # Low
-        
-        return min(1.0, risk_score)
-    
-    def _calculate_general_weather_risk(self, current_data: List[Dict], forecast_data: List[Dict]) -> float:
-        """Calculate general weather instability risk."""
-        if not current_data and not forecast_data:
-            return 0.0
-        
-        all_data = current_data + forecast_data
-        risk_score = 0.0
-        
-        # Visibility risk
-        visibility_values = [d.get('visibility', 10) for d in all_data if 'visibility' in d]
-        if visibility_values:
-            min_visibility = min(visibility_values)
-            if min_visibility < 2:
-                risk_score += 0.2
-            elif min_visibility < 5:
-                risk_score += 0.1
+        # Pack each reading into a contiguous column once; missing readings become NaN
+        typhoon_risk, flood_risk, heat_risk, general_risk = _score_kernel(
+            _column(all_data, 'temperature'),
+            _column(all_data, 'wind_speed'),
+            _column(all_data, 'pressure'),
+            _column(all_data, 'humidity'),
+            _column(forecast_data, 'precipitation_probability', missing=0.0),
+            _column(all_data, 'visibility', falsy_missing=False)
+        )
         
         # Weather condition risk
-        conditions = [d.get('weather_condition', '') for d in all_data]
-        severe_conditions = ['Thunderstorm', 'Snow', 'Tornado', 'Severe']
-        if any(cond in conditions for cond in severe_conditions):
-            risk_score += 0.3
-        
-        return min(1.0, risk_score)
+        if _SEVERE_CONDITIONS.intersection(d.get('weather_condition', '') for d in all_data):
+            general_risk = min(1.0, general_risk + 0.3)
+        
+        return {
+            'typhoon': float(typhoon_risk),
+            'flooding': float(flood_risk),
+            'heat_stress': float(heat_risk),
+            'general_weather': float(general_risk)
+        }
     
     def _categorize_risk_level(self, risk_score: float) -> str:
         """Categorize overall risk level."""
@@ -817,7 +784,7 @@ class WeatherAnalysisService:
                 "Prepare public communication systems"
             ])
         
-        return list(set(recommendations))  # Remove duplicates
+        return list(dict.fromkeys(recommendations))  # Remove duplicates, keep order
     
     def _identify_risk_factors(self, current_data: List[Dict], forecast_data: List[Dict], category_risks: Dict[str, float]) -> List[str]:
         """Identify specific factors contributing to risk."""
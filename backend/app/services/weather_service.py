@@ -4,6 +4,7 @@ Handles all interactions with OpenWeather API
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 from typing import Dict, Optional, List
 from datetime import datetime, timezone
@@ -11,6 +12,9 @@ import os
 from dataclasses import dataclass
 from ..core.config import settings
 
+# Keep-alive connections kept open to the OpenWeather API
+HTTP_POOL_SIZE = 20
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -59,8 +63,18 @@ class OpenWeatherService:
         self.base_url = "http://api.openweathermap.org/data/2.5"
         self.timeout = 10 # seconds
 
+        # Reuse connections across requests instead of a new TCP/TLS handshake per call
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
         logger.info("OpenWeather service initialized")
 
+    def close(self):
+        """Close pooled HTTP connections."""
+        self.session.close()
+
     def get_current_weather(self, location: str, units: str = "metric") -> WeatherData:
         """Get current weather for a location.
 
@@ -83,7 +97,7 @@ class OpenWeatherService:
 
         try:
             logger.info(f"Fetching current weather for {location}")
-            response = requests.get(url, params=params, timeout=self.timeout)
+            response = self.session.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()
 
             data = response.json()
@@ -117,7 +131,7 @@ class OpenWeatherService:
 
         try:
             logger.info(f"Fetching weather for coordinates {lat}, {lon}")
-            response = requests.get(url, params=params, timeout=self.timeout)
+            response = self.session.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -153,7 +167,7 @@ class OpenWeatherService:
         
         try:
             logger.info(f"Fetching {days}-day forecast for {location}")
-            response = requests.get(url, params=params, timeout=self.timeout)
+            response = self.session.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()
             
             data = response.json()
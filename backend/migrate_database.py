@@ -157,6 +157,8 @@ def run_migration():
             CREATE INDEX IF NOT EXISTS idx_agent_workflows_location ON agent_workflows(location);
             CREATE INDEX IF NOT EXISTS idx_agent_workflows_priority ON agent_workflows(priority);
             CREATE INDEX IF NOT EXISTS idx_agent_workflows_started_at ON agent_workflows(started_at);
+            -- Small partial index for the in-flight workflow count on the status endpoint
+            CREATE INDEX IF NOT EXISTS idx_agent_workflows_in_flight ON agent_workflows(status) WHERE status IN ('pending', 'running');
 
             CREATE INDEX IF NOT EXISTS idx_agent_messages_workflow_id ON agent_messages(workflow_id);
             CREATE INDEX IF NOT EXISTS idx_agent_messages_sender ON agent_messages(sender_agent);
@@ -172,6 +174,9 @@ def run_migration():
 
             CREATE INDEX IF NOT EXISTS idx_agent_performance_agent_name ON agent_performance_metrics(agent_name);
             CREATE INDEX IF NOT EXISTS idx_agent_performance_metric_name ON agent_performance_metrics(metric_name);
+
+            -- Latest/windowed reads per location (statistics, current weather by location)
+            CREATE INDEX IF NOT EXISTS idx_current_weather_location_timestamp ON current_weather(location, timestamp DESC);
             """
             
             connection.execute(text(index_sql))
@@ -193,6 +198,15 @@ def run_migration():
             ALTER TABLE risk_assessments ADD COLUMN IF NOT EXISTS agent_execution_id UUID;
             ALTER TABLE risk_assessments ADD COLUMN IF NOT EXISTS model_version VARCHAR(50);
             ALTER TABLE risk_assessments ADD COLUMN IF NOT EXISTS validation_status VARCHAR(20) DEFAULT 'pending';
+
+            -- Lowercased locations for indexed equality/prefix lookups
+            ALTER TABLE current_weather ADD COLUMN IF NOT EXISTS location_key VARCHAR(255) GENERATED ALWAYS AS (lower(location)) STORED;
+            ALTER TABLE weather_forecasts ADD COLUMN IF NOT EXISTS location_key VARCHAR(255) GENERATED ALWAYS AS (lower(location)) STORED;
+            CREATE INDEX IF NOT EXISTS idx_current_weather_location_key ON current_weather(location_key varchar_pattern_ops);
+            CREATE INDEX IF NOT EXISTS idx_weather_forecasts_location_key ON weather_forecasts(location_key varchar_pattern_ops);
+
+            -- Observation time filled in by the database
+            ALTER TABLE current_weather ALTER COLUMN timestamp SET DEFAULT NOW();
             """
             
             connection.execute(text(enhancement_sql))
@@ -265,6 +279,50 @@ def run_migration():
                 RETURN execution_id;
             END;
             $$ LANGUAGE plpgsql;
+
+            -- Function to log a completed execution and store its follow-up message together.
+            -- p_output_key names the payload entry holding the execution output, which is
+            -- rebuilt here from p_output_data instead of being sent twice by the caller
+            CREATE OR REPLACE FUNCTION log_and_emit(
+                p_agent_name VARCHAR(100),
+                p_execution_type VARCHAR(50),
+                p_workflow_id UUID,
+                p_input_data JSONB,
+                p_output_data JSONB,
+                p_execution_time_ms INTEGER,
+                p_message_id UUID,
+                p_message_type VARCHAR(50),
+                p_recipient_agent VARCHAR(100),
+                p_correlation_id UUID,
+                p_payload JSONB,
+                p_priority INTEGER,
+                p_output_key TEXT DEFAULT NULL
+            ) RETURNS UUID AS $$
+            DECLARE
+                execution_id UUID;
+            BEGIN
+                execution_id := log_agent_execution(
+                    p_agent_name, p_execution_type, p_workflow_id, p_input_data,
+                    p_output_data, 'completed', p_execution_time_ms, NULL
+                );
+                
+                INSERT INTO agent_messages (
+                    id, message_type, sender_agent, recipient_agent, workflow_id,
+                    correlation_id, payload, priority, status
+                )
+                VALUES (
+                    p_message_id, p_message_type, p_agent_name, p_recipient_agent, p_workflow_id,
+                    p_correlation_id,
+                    CASE
+                        WHEN p_output_key IS NULL THEN p_payload
+                        ELSE p_payload || jsonb_build_object(p_output_key, p_output_data)
+                    END,
+                    p_priority, 'sent'
+                );
+                
+                RETURN execution_id;
+            END;
+            $$ LANGUAGE plpgsql;
             """
             
             connection.execute(text(function_sql))
@@ -0,0 +1,216 @@
+"""
+Unit tests for Agent Coordinator
+"""
+
+import unittest
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.agents.base_agent import BaseAgent
+from app.agents.agent_coordinator import AgentCoordinator
+
+
+class StubAgent(BaseAgent):
+    """Agent returning a fixed result after an optional delay."""
+
+    def __init__(self, agent_name, result, delay=0.0):
+        super().__init__(agent_name)
+        self.result = result
+        self.delay = delay
+        self.fail = False
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def process(self, input_data, db=None):
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("stub failure")
+        return dict(self.result, location=input_data["location"])
+
+
+class StubActionAgent(StubAgent):
+    """Action agent stub with a routine fast path for LOW/UNKNOWN risk."""
+
+    def routine_plan(self, input_data):
+        if input_data.get("risk_level") not in ("LOW", "UNKNOWN"):
+            return None
+        return {
+            "location": input_data["location"],
+            "risk_level": input_data["risk_level"],
+            "plan_priority": 5
+        }
+
+
+def make_coordinator(delay=0.0, risk_level="HIGH"):
+    """Coordinator wired to stub agents."""
+    weather = StubAgent(
+        "WeatherAnalysisAgent",
+        {"patterns_count": 1, "anomalies_count": 0, "weather_patterns": [{"type": "rain"}]},
+        delay
+    )
+    risk = StubAgent(
+        "RiskAssessmentAgent",
+        {"overall_risk": 0.7, "risk_level": risk_level, "category_risks": {"typhoon": 0.2}},
+        delay
+    )
+    action = StubActionAgent("ActionPlanningAgent", {"plan_priority": 2})
+    return AgentCoordinator(weather=weather, risk=risk, action=action)
+
+
+class TestBatchAnalysis(unittest.TestCase):
+    """Test cases for run_full_analysis_batch."""
+
+    def test_batch_runs_pipelines_concurrently(self):
+        """Test a full batch takes about as long as a single pipeline."""
+        delay = 0.3
+        coordinator = make_coordinator(delay=delay)
+
+        start = time.perf_counter()
+        coordinator.run_full_analysis("Warmup")
+        single_time = time.perf_counter() - start
+
+        locations = [f"City {i}" for i in range(AgentCoordinator.BATCH_POOL_SIZE)]
+        start = time.perf_counter()
+        results = list(coordinator.run_full_analysis_batch(locations))
+        batch_time = time.perf_counter() - start
+
+        self.assertEqual(sorted(r.location for r in results), sorted(locations))
+        # Serialized agent calls would take BATCH_POOL_SIZE times longer
+        self.assertLess(batch_time, single_time * 2 + delay)
+
+
+class TestResultCache(unittest.TestCase):
+    """Test cases for the weather/risk result cache."""
+
+    def setUp(self):
+        self.coordinator = make_coordinator()
+        self.weather = self.coordinator.weather_agent
+        self.risk = self.coordinator.risk_agent
+
+    def test_repeat_analysis_hits_cache(self):
+        """Test a repeated location reuses the cached weather and risk results."""
+        first = self.coordinator.run_full_analysis("Manila,PH")
+        second = self.coordinator.run_full_analysis("Manila,PH")
+
+        self.assertEqual(self.weather.calls, 1)
+        self.assertEqual(self.risk.calls, 1)
+        self.assertEqual(dict(first.weather_result, cached=True), second.weather_result)
+
+        # Callers get deep copies, so mutating one result leaves the cache intact
+        second.weather_result["patterns_count"] = 99
+        second.weather_result["weather_patterns"].append({"type": "injected"})
+        second.risk_result["category_risks"]["typhoon"] = 1.0
+        third = self.coordinator.run_full_analysis("Manila,PH")
+        self.assertEqual(third.weather_patterns, 1)
+        self.assertEqual(third.weather_result["weather_patterns"], [{"type": "rain"}])
+        self.assertEqual(third.risk_result["category_risks"], {"typhoon": 0.2})
+
+    def test_cache_hits_are_marked(self):
+        """Test hits are flagged and keep the original run's metadata."""
+        first = self.coordinator.run_full_analysis("Manila,PH")
+        second = self.coordinator.run_full_analysis("Manila,PH")
+
+        self.assertNotIn("cached", first.weather_result)
+        self.assertTrue(second.weather_result["cached"])
+        self.assertTrue(second.risk_result["cached"])
+        self.assertEqual(second.weather_result["execution_id"], first.weather_result["execution_id"])
+
+    def test_failures_are_not_cached(self):
+        """Test a failed agent run is retried on the next call."""
+        self.weather.fail = True
+        failed = self.coordinator.run_full_analysis("Cebu,PH")
+        self.assertEqual(failed.weather_result["status"], "error")
+        self.assertFalse(failed.all_successful)
+
+        self.weather.fail = False
+        retried = self.coordinator.run_full_analysis("Cebu,PH")
+        self.assertEqual(retried.weather_result["status"], "success")
+        self.assertEqual(self.weather.calls, 2)
+
+    def test_invalidate_forces_refresh(self):
+        """Test invalidate() drops only the given location's results."""
+        self.coordinator.run_full_analysis("Manila,PH")
+        self.coordinator.run_full_analysis("Davao,PH")
+
+        self.coordinator.invalidate("Manila,PH")
+        self.coordinator.run_full_analysis("Manila,PH")
+        self.coordinator.run_full_analysis("Davao,PH")
+
+        self.assertEqual(self.weather.calls, 3)
+        self.assertEqual(self.risk.calls, 3)
+
+    def test_async_and_sync_paths_share_cache(self):
+        """Test the async entry point reads and honours the same cache."""
+        self.coordinator.run_full_analysis("Manila,PH")
+        self.coordinator.run_full_analysis_sync("Manila,PH")
+        self.assertEqual(self.weather.calls, 1)
+
+        self.coordinator.invalidate("Manila,PH")
+        self.coordinator.run_full_analysis_sync("Manila,PH")
+        self.assertEqual(self.weather.calls, 2)
+        self.coordinator.run_full_analysis("Manila,PH")
+        self.assertEqual(self.weather.calls, 2)
+
+
+class TestRoutineActionFastPath(unittest.TestCase):
+    """Test cases for the routine action plan fast path."""
+
+    def test_low_and_unknown_risk_use_fast_path(self):
+        """Test LOW/UNKNOWN risk skips the action agent and counts hits."""
+        for expected_hits, risk_level in enumerate(("LOW", "UNKNOWN"), start=1):
+            coordinator = make_coordinator(risk_level=risk_level)
+            result = coordinator.run_full_analysis("Manila,PH")
+
+            self.assertEqual(coordinator.action_agent.calls, 0)
+            self.assertEqual(coordinator.fast_path_hits, 1)
+            self.assertTrue(result.action_result["fast_path"])
+
+        coordinator.run_full_analysis("Cebu,PH")
+        self.assertEqual(coordinator.fast_path_hits, 2)
+
+    def test_fast_path_result_matches_execute_shape(self):
+        """Test fast-path plans carry the same metadata keys as execute() results."""
+        routine = make_coordinator(risk_level="LOW").run_full_analysis("Manila,PH")
+        executed = make_coordinator(risk_level="HIGH").run_full_analysis("Manila,PH")
+
+        metadata = {"agent_name", "execution_id", "executed_at", "status"}
+        self.assertTrue(metadata <= routine.action_result.keys())
+        self.assertTrue(metadata <= executed.action_result.keys())
+        self.assertIsNone(routine.action_result["execution_id"])
+        self.assertEqual(routine.action_result["status"], "success")
+        self.assertTrue(routine.all_successful)
+
+    def test_elevated_risk_runs_action_agent(self):
+        """Test HIGH risk goes through the action agent, not the fast path."""
+        coordinator = make_coordinator(risk_level="HIGH")
+        result = coordinator.run_full_analysis("Manila,PH")
+
+        self.assertEqual(coordinator.action_agent.calls, 1)
+        self.assertEqual(coordinator.fast_path_hits, 0)
+        self.assertNotIn("fast_path", result.action_result)
+
+    def test_agents_without_fast_path_always_run(self):
+        """Test a plain BaseAgent action agent is executed for routine risk too."""
+        coordinator = make_coordinator(risk_level="LOW")
+        coordinator.action_agent = StubAgent("ActionPlanningAgent", {"plan_priority": 4})
+
+        result = coordinator.run_full_analysis("Manila,PH")
+
+        self.assertEqual(coordinator.action_agent.calls, 1)
+        self.assertEqual(coordinator.fast_path_hits, 0)
+        self.assertEqual(result.plan_priority, 4)
+        self.assertTrue(result.all_successful)
+
+
+if __name__ == '__main__':
+    # Run the tests
+    unittest.main(verbosity=2)
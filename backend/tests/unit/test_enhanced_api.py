@@ -1,5 +1,6 @@
 import sys
 import os
+from datetime import datetime
 from pathlib import Path
 
 # Add backend to path
@@ -16,7 +17,7 @@ from fastapi import BackgroundTasks
 print("✅ Imports successful")
 
 # Test the enhanced analysis
-async def test_comprehensive_analysis():
+def test_comprehensive_analysis():
     try:
         db = SessionLocal()
         
@@ -31,7 +32,12 @@ async def test_comprehensive_analysis():
         background_tasks = BackgroundTasks()
         
         # Call the comprehensive analysis
-        result = await comprehensive_weather_analysis(request, background_tasks, db)
+        result = comprehensive_weather_analysis(
+            request=request,
+            background_tasks=background_tasks,
+            now=datetime.now(),
+            db=db
+        )
         
         print(f"✅ Analysis completed for {result.location}")
         print(f"   Risk level: {result.risk_assessment.get('risk_level', 'N/A')}")
@@ -42,6 +48,5 @@ async def test_comprehensive_analysis():
     except Exception as e:
         print(f"❌ Error: {e}")
 
-# Run the async test
-import asyncio
-asyncio.run(test_comprehensive_analysis())
\ No newline at end of file
+# Run the test
+test_comprehensive_analysis()
\ No newline at end of file
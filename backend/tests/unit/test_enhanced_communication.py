@@ -0,0 +1,217 @@
+"""
+Unit tests for Enhanced Agent Communication
+"""
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock, Mock
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.agents.enhanced_communication import AgentEventBus, AgentMessage, MessageType
+
+
+def make_message(index, priority=3):
+    """Build a message with the given priority (1=highest, 5=lowest)."""
+    return AgentMessage(
+        message_id=f"message-{index}",
+        message_type=MessageType.WEATHER_UPDATE,
+        sender_agent="WeatherAgent",
+        recipient_agent="RiskAgent",
+        payload={"index": index},
+        priority=priority,
+        timestamp=0.0
+    )
+
+
+async def settle():
+    """Give the background flusher a few event loop turns to react."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestMessageFlusher(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the batched message persistence in AgentEventBus."""
+
+    def setUp(self):
+        """Setup a bus whose database writes are recorded instead of executed."""
+        self.bus = AgentEventBus(Mock())
+        self.batches = []
+        self.bus._store_messages_in_db = lambda messages: self.batches.append(
+            [message.message_id for message in messages]
+        )
+
+    async def asyncTearDown(self):
+        await self.bus.close()
+
+    async def test_full_batch_flushes_without_waiting(self):
+        """Test FLUSH_BATCH_SIZE pending messages are written before the interval ends."""
+        # Only the size trigger can fire within this test
+        self.bus.FLUSH_INTERVAL_SECONDS = 60
+
+        for i in range(AgentEventBus.FLUSH_BATCH_SIZE - 1):
+            await self.bus.publish(make_message(i))
+        await settle()
+        self.assertEqual(self.batches, [])
+
+        await self.bus.publish(make_message(AgentEventBus.FLUSH_BATCH_SIZE - 1))
+        await settle()
+
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(len(self.batches[0]), AgentEventBus.FLUSH_BATCH_SIZE)
+        self.assertEqual(self.bus._pending, [])
+
+    async def test_partial_batch_flushes_after_interval(self):
+        """Test a small batch is written once FLUSH_INTERVAL_SECONDS pass."""
+        for i in range(5):
+            await self.bus.publish(make_message(i))
+        await settle()
+        self.assertEqual(self.batches, [])
+
+        await asyncio.sleep(AgentEventBus.FLUSH_INTERVAL_SECONDS * 5)
+
+        self.assertEqual(self.batches, [[f"message-{i}" for i in range(5)]])
+        self.assertTrue(self.bus._flush_task.done())
+
+    async def test_high_priority_bypasses_interval(self):
+        """Test priority 1-2 messages flush immediately, taking buffered ones along."""
+        self.bus.FLUSH_INTERVAL_SECONDS = 60
+
+        await self.bus.publish(make_message(0, priority=3))
+        await self.bus.publish(make_message(1, priority=AgentEventBus.FAST_PATH_PRIORITY + 1))
+        await settle()
+        self.assertEqual(self.batches, [])
+
+        await self.bus.publish(make_message(2, priority=AgentEventBus.FAST_PATH_PRIORITY))
+        await settle()
+        self.assertEqual(self.batches, [["message-0", "message-1", "message-2"]])
+
+        await self.bus.publish(make_message(3, priority=1))
+        await settle()
+        self.assertEqual(self.batches[1:], [["message-3"]])
+
+    async def test_close_drains_pending_messages(self):
+        """Test close() writes buffered messages and stops the flusher."""
+        self.bus.FLUSH_INTERVAL_SECONDS = 60
+
+        for i in range(10):
+            await self.bus.publish(make_message(i))
+        await settle()
+        flush_task = self.bus._flush_task
+
+        await self.bus.close()
+
+        self.assertEqual(self.batches, [[f"message-{i}" for i in range(10)]])
+        self.assertEqual(self.bus._pending, [])
+        self.assertTrue(flush_task.done())
+
+    async def test_unpersisted_messages_are_not_buffered(self):
+        """Test persist=False delivers without queuing a write."""
+        await self.bus.publish(make_message(0, priority=1), persist=False)
+        await self.bus.close()
+
+        self.assertEqual(self.batches, [])
+        self.assertIsNone(self.bus._flush_task)
+
+
+class TestEventBusTransactions(unittest.IsolatedAsyncioTestCase):
+    """Test cases for per-task workflow transactions on AgentEventBus."""
+
+    def setUp(self):
+        """Setup a bus that hands each transaction() a fresh mock session."""
+        self.base_session = Mock()
+        self.bus = AgentEventBus(self.base_session)
+        self.sessions = []
+
+        def new_session():
+            session = MagicMock()
+            self.sessions.append(session)
+            return session
+
+        self.bus._new_session = new_session
+
+    async def asyncTearDown(self):
+        await self.bus.close()
+
+    async def write(self, statement):
+        """Write the way the bus's agents do, through _write_scope."""
+        with self.bus._write_scope() as session:
+            session.execute(statement)
+
+    async def test_concurrent_workflows_do_not_share_a_transaction(self):
+        """Test one workflow commits on exit while another later rolls back alone."""
+        a_done = asyncio.Event()
+
+        async def workflow_a():
+            async with self.bus.transaction():
+                await self.write("a")
+            a_done.set()
+
+        async def workflow_b():
+            async with self.bus.transaction():
+                await self.write("b")
+                await a_done.wait()
+                raise RuntimeError("workflow b failed")
+
+        results = await asyncio.gather(workflow_b(), workflow_a(), return_exceptions=True)
+
+        self.assertIsInstance(results[0], RuntimeError)
+        session_b, session_a = self.sessions
+        session_a.execute.assert_called_once_with("a")
+        session_a.commit.assert_called_once()
+        session_a.rollback.assert_not_called()
+        session_b.execute.assert_called_once_with("b")
+        session_b.rollback.assert_called_once()
+        session_b.commit.assert_not_called()
+        self.base_session.commit.assert_not_called()
+        self.base_session.rollback.assert_not_called()
+
+    async def test_nested_blocks_join_the_outer_transaction(self):
+        """Test a nested transaction() reuses the session and commits once."""
+        async with self.bus.transaction():
+            async with self.bus.transaction():
+                await self.write("inner")
+            await self.write("outer")
+
+        self.assertEqual(len(self.sessions), 1)
+        self.assertEqual(self.sessions[0].execute.call_count, 2)
+        self.sessions[0].commit.assert_called_once()
+        self.sessions[0].close.assert_called_once()
+
+    async def test_workflow_start_is_committed_immediately(self):
+        """Test start_workflow commits on the bus session, not the open transaction."""
+        async with self.bus.transaction():
+            workflow_id = self.bus.start_workflow("emergency", "WorkflowOrchestrator", {})
+            self.base_session.commit.assert_called_once()
+            self.sessions[0].execute.assert_not_called()
+
+        self.assertIn(workflow_id, self.bus.active_workflows)
+
+    async def test_tasks_outliving_a_transaction_commit_on_their_own(self):
+        """Test a task started inside a block stops using its session after exit."""
+        leave = asyncio.Event()
+        written = asyncio.Event()
+
+        async def consumer():
+            await leave.wait()
+            await self.write("late")
+            written.set()
+
+        async with self.bus.transaction():
+            task = asyncio.create_task(consumer())
+        leave.set()
+        await written.wait()
+        await task
+
+        self.sessions[0].execute.assert_not_called()
+        self.base_session.execute.assert_called_once_with("late")
+        self.base_session.commit.assert_called_once()
+
+
+if __name__ == '__main__':
+    # Run the tests
+    unittest.main(verbosity=2)
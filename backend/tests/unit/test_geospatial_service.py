@@ -0,0 +1,43 @@
+"""
+Unit tests for Geospatial Service
+"""
+
+import unittest
+from unittest.mock import Mock
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.geospatial_service import GeospatialService
+
+
+class TestProcessLocationData(unittest.TestCase):
+    """Test cases for GeospatialService.process_location_data."""
+
+    def setUp(self):
+        """Setup service on a session whose queries fail."""
+        self.db = Mock()
+        self.db.query.side_effect = RuntimeError("connection lost")
+        self.service = GeospatialService(self.db)
+
+    def test_failed_weather_fetch_is_recorded_per_location(self):
+        """Test a failing batched fetch records the error for every location."""
+        locations = ["Manila,PH", "Cebu City,PH"]
+
+        result = self.service.process_location_data(locations, hours=24)
+
+        self.assertEqual(result, {location: {'error': "connection lost"} for location in locations})
+        self.db.query.assert_called_once()
+
+    def test_no_locations_skips_the_query(self):
+        """Test an empty location list returns no data without querying."""
+        self.assertEqual(self.service.process_location_data([]), {})
+        self.db.query.assert_not_called()
+
+
+if __name__ == '__main__':
+    # Run the tests
+    unittest.main(verbosity=2)
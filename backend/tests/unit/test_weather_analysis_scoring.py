@@ -0,0 +1,141 @@
+"""
+Unit tests for Weather Analysis risk scoring
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.weather_analysis import (
+    WeatherAnalysisService, _band, _score_kernel,
+    _WIND_CUTOFFS, _WIND_SCORES, _HUMIDITY_CUTOFFS, _HUMIDITY_SCORES,
+    _PRECIP_CUTOFFS, _PRECIP_SCORES, _HEAT_CUTOFFS, _HEAT_SCORES,
+    _PRESSURE_DROP_CUTOFFS, _PRESSURE_DROP_SCORES,
+    _VISIBILITY_CUTOFFS, _VISIBILITY_SCORES
+)
+
+# Category score indexes returned by _score_kernel
+TYPHOON, FLOODING, HEAT, GENERAL = range(4)
+
+
+def kernel(temps=(), winds=(), pressures=(), humidity=(), precip=(), visibility=()):
+    """Run the scoring kernel on plain sequences; None becomes a missing (NaN) reading."""
+    def column(values):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return _score_kernel(column(temps), column(winds), column(pressures),
+                         column(humidity), column(precip), column(visibility))
+
+
+class TestBand(unittest.TestCase):
+    """Test cases for cut-off banding; a reading exactly on a cut-off scores the higher band."""
+
+    def assertBands(self, cutoffs, scores, expected):
+        for value, score in expected:
+            with self.subTest(value=value):
+                self.assertAlmostEqual(_band(value, cutoffs, scores), score)
+
+    def test_wind_speed_bands(self):
+        """Test wind speed scoring at the 40/60/90/120 km/h cut-offs."""
+        self.assertBands(_WIND_CUTOFFS, _WIND_SCORES, [
+            (0.0, 0.0), (39.9, 0.0), (40.0, 0.1), (59.9, 0.1), (60.0, 0.2),
+            (89.9, 0.2), (90.0, 0.3), (119.9, 0.3), (120.0, 0.4), (250.0, 0.4)
+        ])
+
+    def test_humidity_bands(self):
+        """Test humidity scoring at the 80/90/95 % cut-offs."""
+        self.assertBands(_HUMIDITY_CUTOFFS, _HUMIDITY_SCORES, [
+            (79.9, 0.0), (80.0, 0.1), (89.9, 0.1), (90.0, 0.2),
+            (94.9, 0.2), (95.0, 0.3), (100.0, 0.3)
+        ])
+
+    def test_visibility_bands(self):
+        """Test visibility scoring below/at the 2 and 5 km cut-offs."""
+        self.assertBands(_VISIBILITY_CUTOFFS, _VISIBILITY_SCORES, [
+            (0.0, 0.2), (1.99, 0.2), (2.0, 0.1), (4.99, 0.1), (5.0, 0.0), (10.0, 0.0)
+        ])
+
+    def test_precipitation_bands(self):
+        """Test precipitation probability scoring at the 50/70/90 % cut-offs."""
+        self.assertBands(_PRECIP_CUTOFFS, _PRECIP_SCORES, [
+            (49.0, 0.0), (50.0, 0.2), (70.0, 0.3), (89.0, 0.3), (90.0, 0.4)
+        ])
+
+    def test_heat_and_pressure_bands(self):
+        """Test temperature and pressure drop scoring at their cut-offs."""
+        self.assertBands(_HEAT_CUTOFFS, _HEAT_SCORES, [
+            (31.9, 0.0), (32.0, 0.1), (35.0, 0.2), (38.0, 0.3), (42.0, 0.4)
+        ])
+        self.assertBands(_PRESSURE_DROP_CUTOFFS, _PRESSURE_DROP_SCORES, [
+            (9.9, 0.0), (10.0, 0.1), (15.0, 0.2), (25.0, 0.3)
+        ])
+
+
+class TestScoreKernel(unittest.TestCase):
+    """Test cases for the vectorised category scoring kernel."""
+
+    def test_peak_wind_and_pressure_drop(self):
+        """Test typhoon risk uses the peak wind and sharpest pressure change."""
+        scores = kernel(winds=[20.0, 90.0, 45.0], pressures=[1010.0, 1000.0, 985.0])
+        self.assertAlmostEqual(scores[TYPHOON], 0.3 + 0.2)
+
+    def test_mean_humidity_on_boundary(self):
+        """Test flooding risk uses mean humidity; a mean of exactly 95 scores the top band."""
+        scores = kernel(humidity=[90.0, 100.0], precip=[20.0, 90.0])
+        self.assertAlmostEqual(scores[FLOODING], 0.3 + 0.4)
+
+    def test_missing_readings_are_skipped(self):
+        """Test NaN readings are ignored rather than scored or raising."""
+        scores = kernel(
+            temps=[None, 38.0], winds=[None, 60.0], pressures=[None, 1000.0],
+            humidity=[None, 80.0], visibility=[None, 4.0]
+        )
+        np.testing.assert_allclose(scores, [0.2, 0.1, 0.3, 0.1])
+
+        np.testing.assert_allclose(kernel(winds=[None], visibility=[None]), [0.0, 0.0, 0.0, 0.0])
+
+    def test_no_readings_score_zero(self):
+        """Test empty columns score zero in every category."""
+        np.testing.assert_allclose(kernel(), [0.0, 0.0, 0.0, 0.0])
+
+
+class TestCategoryRisks(unittest.TestCase):
+    """Test cases for WeatherAnalysisService._calculate_category_risks."""
+
+    def setUp(self):
+        """Setup service without a database; scoring does not query."""
+        self.service = WeatherAnalysisService(None)
+
+    def test_none_precipitation_and_visibility(self):
+        """Test None precipitation and visibility values are skipped instead of raising."""
+        current = [{'temperature': 30.0, 'wind_speed': 40.0, 'humidity': 85, 'visibility': None}]
+        forecast = [
+            {'temperature': 31.0, 'precipitation_probability': None, 'visibility': None},
+            {'temperature': 29.0, 'precipitation_probability': 70}
+        ]
+
+        risks = self.service._calculate_category_risks(current, forecast)
+
+        self.assertAlmostEqual(risks['typhoon'], 0.1)
+        self.assertAlmostEqual(risks['flooding'], 0.1 + 0.3)
+        self.assertAlmostEqual(risks['heat_stress'], 0.0)
+        self.assertAlmostEqual(risks['general_weather'], 0.0)
+
+    def test_visibility_boundary_and_severe_condition(self):
+        """Test visibility of exactly 2 km plus a severe condition adds both scores."""
+        current = [{'visibility': 2.0, 'weather_condition': 'Thunderstorm'}]
+        forecast = [{'visibility': 8.0, 'weather_condition': 'Rain'}]
+
+        risks = self.service._calculate_category_risks(current, forecast)
+
+        self.assertAlmostEqual(risks['general_weather'], 0.1 + 0.3)
+
+
+if __name__ == '__main__':
+    # Run the tests
+    unittest.main(verbosity=2)
@@ -22,6 +22,14 @@ class TestOpenWeatherService(unittest.TestCase):
         """Setup test fixtures."""
         self.api_key = "test_api_key_12345"
         self.service = OpenWeatherService(api_key=self.api_key)
+        
+        # Fail loudly if any request would reach the network
+        offline = patch(
+            'requests.adapters.HTTPAdapter.send',
+            side_effect=AssertionError("unit tests must not make network calls")
+        )
+        self.network_send = offline.start()
+        self.addCleanup(offline.stop)
 
         # Mock response data
         self.mock_response_data = {
@@ -56,7 +64,7 @@ class TestOpenWeatherService(unittest.TestCase):
         with self.assertRaises(WeatherAPIError):
             OpenWeatherService(api_key="")
     
-    @patch('app.services.weather_service.requests.get')
+    @patch('app.services.weather_service.requests.Session.get')
     def test_get_current_weather_success(self, mock_get):
         """Test successful weather data retrieval."""
         # Mock successful response
@@ -76,13 +84,14 @@ class TestOpenWeatherService(unittest.TestCase):
         self.assertEqual(result.pressure, 1013.25)
         self.assertEqual(result.weather_condition, "Clouds")
         
-        # Verify API call
+        # Verify API call went through the pooled session, not the network
+        self.network_send.assert_not_called()
         mock_get.assert_called_once()
         call_args = mock_get.call_args
         self.assertIn("'q': 'Manila,PH'", str(call_args))
         self.assertIn(self.api_key, str(call_args))
     
-    @patch('app.services.weather_service.requests.get')
+    @patch('app.services.weather_service.requests.Session.get')
     def test_get_current_weather_api_error(self, mock_get):
         """Test API error handling."""
        # Mock failed response
@@ -92,8 +101,9 @@ class TestOpenWeatherService(unittest.TestCase):
         # Test error handling
         with self.assertRaises(WeatherAPIError):
             self.service.get_current_weather("InvalidLocation")
+        mock_get.assert_called_once()
     
-    @patch('app.services.weather_service.requests.get')
+    @patch('app.services.weather_service.requests.Session.get')
     def test_get_weather_by_coordinates(self, mock_get):
         """Test weather retrieval by coordinates."""
         mock_response = Mock()
@@ -106,8 +116,10 @@ class TestOpenWeatherService(unittest.TestCase):
         self.assertIsInstance(result, WeatherData)
         self.assertEqual(result.latitude, 14.5995)
         self.assertEqual(result.longitude, 120.9842)
+        mock_get.assert_called_once()
+        self.network_send.assert_not_called()
     
-    @patch('app.services.weather_service.requests.get')
+    @patch('app.services.weather_service.requests.Session.get')
     def test_get_weather_forecast(self, mock_get):
         """Test forecast data retrieval."""
         mock_forecast_data = {
@@ -134,6 +146,21 @@ class TestOpenWeatherService(unittest.TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]['temperature'], 29.0)
         self.assertEqual(result[0]['weather_condition'], 'Rain')
+        mock_get.assert_called_once()
+        self.network_send.assert_not_called()
+    
+    def test_session_reused_across_calls(self):
+        """Test all calls share one pooled session."""
+        mock_response = Mock()
+        mock_response.json.return_value = self.mock_response_data
+        mock_response.raise_for_status.return_value = None
+        
+        with patch.object(self.service.session, 'get', return_value=mock_response) as mock_get:
+            self.service.get_current_weather("Manila,PH")
+            self.service.get_weather_by_coordinates(14.5995, 120.9842)
+        
+        self.assertEqual(mock_get.call_count, 2)
+        self.network_send.assert_not_called()
     
     def test_parse_current_weather(self):
         """Test weather data parsing."""